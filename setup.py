@@ -12,10 +12,15 @@ setup(
         'selenium',
         'undetected-chromedriver',
         'python-dotenv',
+        'requests',
     ],
     entry_points={
         'console_scripts': [
             'ecommerce-tracker=cli:main',
+            'track-prices=ecommerce_tracker.cli:track_prices',
+            'track-batch=ecommerce_tracker.cli:track_batch',
+            'track-sharded=ecommerce_tracker.cli:track_sharded',
+            'track-benchmark=ecommerce_tracker.cli:benchmark',
         ],
     },
 ) 
\ No newline at end of file
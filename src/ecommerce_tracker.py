@@ -1,15 +1,64 @@
-import time
 from helium import (
     start_chrome,
     kill_browser,
+    get_driver,
     go_to as helium_goto,
     write as helium_write,
     press as helium_press,
-    find_all as helium_find_all,
     Text,
     S,
     ENTER,
 )
+from ecommerce_tracker.browser_manager import extract_page_fields
+from ecommerce_tracker.readiness import PageReadiness
+from ecommerce_tracker.recipes import RECIPES, find_product_url
+from ecommerce_tracker.url_cache import ProductUrlCache, matches_query
+
+NOON = RECIPES['noon.com']
+
+def open_cached_product(product_name, url_cache, readiness):
+    """Open the product page an earlier search led to; returns its fields or None"""
+    url = url_cache.get(product_name, NOON.site)
+    if not url:
+        return None
+
+    print(f"Opening cached product page {url}...")
+    helium_goto(url)
+    price_selector = ", ".join(NOON.page_fields['price'])
+    fields = None
+    if readiness.wait_until_ready(price_selector):
+        fields = extract_page_fields(get_driver(), NOON.page_fields)
+    if not fields or not fields['price'] or not matches_query(product_name, get_driver().title):
+        # Gone, or now showing a different product: search again
+        url_cache.invalidate(product_name, NOON.site)
+        return None
+    return fields
+
+def search_product(product_name, url_cache, readiness):
+    """Search noon.com for a product; returns its fields or None"""
+    # Step 1: Navigate to site
+    print("Step 1: Navigating to noon.com...")
+    helium_goto(NOON.url)
+    search_ready = readiness.wait_until_ready(NOON.search_box_selector)
+
+    # Step 2: Find and interact with search box
+    print("Step 2: Looking for search box...")
+    if not search_ready:
+        print("Failed to find search box")
+        return None
+
+    helium_write(product_name, into=S(NOON.search_box_selector))
+    helium_press(ENTER)
+
+    # Step 3: Extract product information
+    print("Step 3: Extracting product information...")
+    readiness.wait_until_ready(NOON.results_selector)
+    fields = extract_page_fields(get_driver(), NOON.fields)
+    if fields['price']:
+        url = find_product_url(get_driver(), NOON)
+        if url:
+            url_cache.put(product_name, NOON.site, url)
+    return fields
 
 def track_product(product_name, site="noon.com"):
     # Initialize result dictionary
@@ -18,93 +67,33 @@ def track_product(product_name, site="noon.com"):
         'availability': 'Unknown',
         'rating': '0.0'
     }
+    readiness = None
+    url_cache = ProductUrlCache()
 
     try:
-        # Step 1: Navigate to site
-        print("Step 1: Navigating to noon.com...")
-        helium_goto("https://www.noon.com/egypt-en/")
-        time.sleep(5)  # Wait for initial page load
-
-        # Step 2: Find and interact with search box
-        print("Step 2: Looking for search box...")
-        search_selectors = [
-            "input[type='search']",
-            "input[data-qa='txt_searchBar']",
-            "input[placeholder*='Search']"
-        ]
-
-        search_found = False
-        for selector in search_selectors:
-            if S(selector).exists():
-                print(f"Found search box with selector: {selector}")
-                helium_write(product_name, into=S(selector))
-                helium_press(ENTER)
-                search_found = True
-                time.sleep(5)  # Wait for search results
-                break
-            time.sleep(1)
-
-        if not search_found:
-            print("Failed to find search box")
-            return result
-
-        # Step 3: Extract product information
-        print("Step 3: Extracting product information...")
-        time.sleep(3)
-
-        # Find price
-        price_selectors = [
-            "div[data-qa='product-price']",
-            "div.priceNow",
-            "span[data-currency='EGP']",
-            "div.productPrice"
-        ]
-
-        for selector in price_selectors:
-            element = S(selector)
-            if element.exists():
-                price_text = element.web_element.text
-                result['price'] = price_text.replace('EGP', '').replace('$', '').strip()
-                print(f"Found price: {result['price']}")
-                break
-            time.sleep(0.5)
-
-        # Find availability
-        availability_selectors = [
-            "div[data-qa='delivery-message']",
-            "div.fulfillmentText",
-            "div.stockStatus",
-            "div[data-qa='availability']"
-        ]
-
-        for selector in availability_selectors:
-            element = S(selector)
-            if element.exists():
-                result['availability'] = element.web_element.text.strip()
-                print(f"Found availability: {result['availability']}")
-                break
-            time.sleep(0.5)
-
-        # Find rating
-        rating_selectors = [
-            "div[data-qa='product-rating']",
-            "div.ratingValue",
-            "div.rating",
-            "span.stars"
-        ]
-
-        for selector in rating_selectors:
-            element = S(selector)
-            if element.exists():
-                rating_text = element.web_element.text.strip()
-                result['rating'] = rating_text.split('/')[0].strip()
-                print(f"Found rating: {result['rating']}")
-                break
-            time.sleep(0.5)
+        readiness = PageReadiness(get_driver())
+        fields = open_cached_product(product_name, url_cache, readiness)
+        if fields:
+            print("Using the cached product page, skipping the search")
+        else:
+            fields = search_product(product_name, url_cache, readiness)
+
+        if fields and fields['price']:
+            result['price'] = fields['price'].replace('EGP', '').replace('$', '').strip()
+            print(f"Found price: {result['price']}")
+
+        if fields and fields['availability']:
+            result['availability'] = fields['availability']
+            print(f"Found availability: {result['availability']}")
+
+        if fields and fields['rating']:
+            result['rating'] = fields['rating'].split('/')[0].strip()
+            print(f"Found rating: {result['rating']}")
 
     except Exception as e:
         print(f"Error during scraping: {str(e)}")
     finally:
+        url_cache.close()
         try:
             kill_browser()
         except:
@@ -115,8 +104,10 @@ def track_product(product_name, site="noon.com"):
     print(f"Price: ${result['price']}")
     print(f"Availability: {result['availability']}")
     print(f"Rating: {result['rating']}/5")
+    if readiness is not None:
+        print(f"Time spent waiting for pages: {readiness.total_wait():.2f}s")
 
     return result
 
 if __name__ == "__main__":
-    track_product("iPhone 16 Pro") 
\ No newline at end of file
+    track_product("iPhone 16 Pro")
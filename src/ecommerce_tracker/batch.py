@@ -0,0 +1,193 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .history import PriceHistory
+from .price_tracker_agent import PriceTrackerAgent
+from .results import is_failed, result_row
+from .scheduler import Scheduler
+from .sinks import JsonlSink
+
+@dataclass
+class BatchItem:
+    product: str
+    sites: List[str] = field(default_factory=list)
+
+def _split_sites(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace('|', ';').split(';')
+    return [site.strip() for site in value if site and site.strip()]
+
+def read_products(path: str) -> Iterator[BatchItem]:
+    """Stream products from a CSV or JSONL file.
+
+    CSV files either have a header with a 'product' column and an optional
+    'sites' column of ';'-separated sites, or list one product per row in
+    the first column. JSONL lines are objects with a 'product' key and an
+    optional 'sites' list.
+    """
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping invalid line {line_number}: {str(e)}")
+                    continue
+                if isinstance(record, str):
+                    record = {'product': record}
+                product = (record.get('product') or '').strip()
+                if product:
+                    yield BatchItem(product=product, sites=_split_sites(record.get('sites')))
+        return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [column.strip().lower() for column in header]
+        if 'product' in columns:
+            product_index = columns.index('product')
+        else:
+            # No header row: the first row is already a product
+            product_index = 0
+            if header and header[0].strip():
+                yield BatchItem(product=header[0].strip())
+        sites_index = columns.index('sites') if 'sites' in columns else None
+
+        for row in reader:
+            if len(row) <= product_index or not row[product_index].strip():
+                continue
+            sites = row[sites_index] if sites_index is not None and len(row) > sites_index else ''
+            yield BatchItem(product=row[product_index].strip(), sites=_split_sites(sites))
+
+def completed_pairs(output_path: str) -> Set[Tuple[str, str]]:
+    """Collect the (product, site) pairs already written to an output file
+
+    Failed checks are left out, so a resumed run tries them again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind
+                continue
+            if not is_failed(record):
+                done.add((record.get('product'), record.get('site')))
+    return done
+
+def run_batch(agent: PriceTrackerAgent, input_path: str, output_path: str,
+              default_sites: List[str], resume: bool = True,
+              history: Optional[PriceHistory] = None,
+              fsync_interval: Optional[float] = None,
+              concurrency: int = 8) -> int:
+    """Track every product in input_path, appending results to output_path as JSONL.
+
+    Up to concurrency products are tracked at the same time, and each result
+    is written as soon as its site finishes. With resume enabled,
+    (product, site) pairs already present in the output file are skipped, so
+    a crashed run can simply be started again. Results are also appended to
+    the price history, if one is given.
+
+    Returns:
+        int: Number of results written
+    """
+    done = completed_pairs(output_path) if resume else set()
+    if done:
+        print(f"Resuming: {len(done)} results already written")
+
+    written = 0
+    with JsonlSink(output_path, append=resume, fsync_interval=fsync_interval) as sink:
+        def track_window(window: List[Tuple[str, List[str]]]) -> int:
+            print(f"\nTracking {', '.join(product for product, _ in window)}...")
+            results = asyncio.run(agent.track_many(
+                window,
+                on_result=lambda product, result: sink.write(result_row(product, result))
+            ))
+            for (product, _), product_results in zip(window, results):
+                done.update((product, result.site) for result in product_results)
+                if history:
+                    history.append(product, product_results)
+            return sum(len(product_results) for product_results in results)
+
+        window = []
+        for item in read_products(input_path):
+            sites = [site for site in (item.sites or default_sites)
+                     if (item.product, site) not in done]
+            if not sites:
+                continue
+            window.append((item.product, sites))
+            if len(window) >= concurrency:
+                written += track_window(window)
+                window = []
+        if window:
+            written += track_window(window)
+
+    return written
+
+def run_scheduled(agent: PriceTrackerAgent, scheduler: Scheduler, input_path: str, output_path: str,
+                  default_sites: List[str], history: Optional[PriceHistory] = None,
+                  fsync_interval: Optional[float] = None, concurrency: int = 8,
+                  on_wave=None) -> None:
+    """Keep tracking every product in input_path at its own cadence, until interrupted.
+
+    Checks are taken from the scheduler as they fall due and their sites'
+    rate limits allow, up to concurrency at a time, and every result is
+    appended to output_path and the price history. on_wave(results, seconds)
+    is called after each wave of checks.
+    """
+    for item in read_products(input_path):
+        for site in item.sites or default_sites:
+            scheduler.add(item.product, site)
+    print(f"Scheduled {len(scheduler)} product checks")
+
+    with JsonlSink(output_path, append=True, fsync_interval=fsync_interval) as sink:
+        while True:
+            due = scheduler.due(limit=concurrency)
+            if not due:
+                wait = scheduler.next_wakeup()
+                if wait is None:
+                    return
+                time.sleep(min(wait, 60.0))
+                continue
+
+            # track_many takes each product once, with all of its due sites
+            window: Dict[str, List[str]] = {}
+            for product, site in due:
+                window.setdefault(product, []).append(site)
+            print(f"\nTracking {len(due)} due checks...")
+            started = time.time()
+            try:
+                results = asyncio.run(agent.track_many(
+                    list(window.items()),
+                    on_result=lambda product, result: sink.write(result_row(product, result))
+                ))
+            except Exception as e:
+                print(f"Tracking wave failed: {str(e)}")
+                results = [[] for _ in window]
+
+            if history:
+                history.start_run()
+            for (product, sites), product_results in zip(window.items(), results):
+                if history:
+                    history.append(product, product_results)
+                prices = {result.site: result.price for result in product_results}
+                for site in sites:
+                    # Failed checks are rescheduled too, at the product's current interval
+                    interval = scheduler.complete(product, site, prices.get(site))
+                    print(f"Next check of {product} on {site} in {interval / 60:.0f} min")
+            if on_wave:
+                on_wave(results, time.time() - started)
@@ -0,0 +1,471 @@
+import base64
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import helium
+from smolagents.models import ChatMessage
+from . import ecommerce_tracker as listing
+from .price_tracker_agent import PriceTrackerAgent
+from .prices import parse_price_info, parse_prices
+from .recipes import RECIPES
+from .session import SessionManager
+from .tracing import TRACER, TracedModel, percentile, span
+from .url_cache import ProductUrlCache
+
+def _benchmarks_dir() -> str:
+    """benchmarks/ of the source checkout, or of the current directory for an installed package"""
+    checkout = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             os.pardir, os.pardir, 'benchmarks'))
+    return checkout if os.path.isdir(checkout) else os.path.abspath('benchmarks')
+
+BENCHMARKS_DIR = _benchmarks_dir()
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures', 'noon')
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, 'results.jsonl')
+# Hand-checked price texts with the amount, currency and range end each must parse to
+PRICE_CORPUS = os.path.join(BENCHMARKS_DIR, 'fixtures', 'prices.jsonl')
+
+# Site name the fixture recipe is registered under while a benchmark runs
+FIXTURE_SITE = 'noon.fixture'
+
+# Scenario -> PriceTrackerAgent options; 'direct' re-opens the remembered product page
+SCENARIOS = {
+    'http': {'http_first': True, 'fast_path': True},
+    'recipe': {'http_first': False, 'fast_path': True},
+    'direct': {'http_first': False, 'fast_path': True},
+    'agent': {'http_first': False, 'fast_path': False},
+    'listing': None,
+    'prices': None,
+}
+
+# Scenarios that need neither the fixture server nor a browser
+OFFLINE_SCENARIOS = {'prices'}
+# Scenarios whose failures are wrong answers rather than slow or flaky runs
+CHECKED_SCENARIOS = {'prices'}
+
+STUB_ANSWER = """Thought: The product details are visible on the results page.
+Code:
+```py
+print("Price: EGP 58,599.00")
+print("Availability: Get it by tomorrow")
+print("Rating: 4.3/5")
+final_answer("Price: EGP 58,599.00")
+```<end_code>"""
+
+@dataclass
+class FixtureResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+def _load_har(path: str) -> Dict[str, FixtureResponse]:
+    """Responses recorded in a HAR file, keyed by path and query"""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f).get('log', {}).get('entries', [])
+    responses = {}
+    for entry in entries:
+        url = urlsplit(entry['request']['url'])
+        response = entry['response']
+        content = response.get('content', {})
+        text = content.get('text') or ''
+        if content.get('encoding') == 'base64':
+            body = base64.b64decode(text)
+        else:
+            body = text.encode('utf-8')
+        # Hop-by-hop and length headers no longer match the replayed body
+        headers = {h['name']: h['value'] for h in response.get('headers', [])
+                   if h['name'].lower() not in ('content-length', 'content-encoding', 'transfer-encoding', 'connection')}
+        key = url.path + (f"?{url.query}" if url.query else '')
+        responses.setdefault(key, FixtureResponse(response.get('status', 200), headers, body))
+        responses.setdefault(url.path, responses[key])
+    return responses
+
+class FixtureServer:
+    """Replays recorded pages from a fixture directory on a local port.
+
+    HAR files in the directory are served by request path and query.
+    Other pages come from routes.json, a list of {"path": glob, "file": name}
+    entries tried in order. HTML responses carry an ETag and Last-Modified,
+    so conditional re-checks behave as they do against the live site.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, host: str = '127.0.0.1', port: int = 0):
+        self.fixtures_dir = fixtures_dir
+        self.recorded: Dict[str, FixtureResponse] = {}
+        for name in sorted(os.listdir(fixtures_dir)):
+            if name.endswith('.har'):
+                self.recorded.update(_load_har(os.path.join(fixtures_dir, name)))
+        routes_path = os.path.join(fixtures_dir, 'routes.json')
+        self.routes: List[Dict[str, str]] = []
+        if os.path.exists(routes_path):
+            with open(routes_path, encoding='utf-8') as f:
+                self.routes = json.load(f)
+        self._files: Dict[str, FixtureResponse] = {}
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                response = server.resolve(self.path)
+                if response is None:
+                    self.send_error(404)
+                    return
+                etag = response.headers.get('ETag')
+                if etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(response.status)
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(response.body)))
+                self.end_headers()
+                self.wfile.write(response.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fixtures', daemon=True)
+
+    def _file(self, name: str) -> FixtureResponse:
+        if name not in self._files:
+            path = os.path.join(self.fixtures_dir, name)
+            with open(path, 'rb') as f:
+                body = f.read()
+            self._files[name] = FixtureResponse(200, {
+                'Content-Type': 'text/html; charset=utf-8',
+                'ETag': '"' + hashlib.sha1(body).hexdigest() + '"',
+                'Last-Modified': formatdate(os.path.getmtime(path), usegmt=True)
+            }, body)
+        return self._files[name]
+
+    def resolve(self, request_path: str) -> Optional[FixtureResponse]:
+        """The recorded response for a request path, or None"""
+        if request_path in self.recorded:
+            return self.recorded[request_path]
+        path = urlsplit(request_path).path
+        if path in self.recorded:
+            return self.recorded[path]
+        for route in self.routes:
+            if fnmatch.fnmatchcase(path, route['path']):
+                return self._file(route['file'])
+        return None
+
+    def url(self, path: str = '/') -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+class StubModel:
+    """Stands in for OpenAIServerModel: answers every call with the same code action"""
+
+    model_id = 'benchmark-stub'
+
+    def __init__(self, answer: str = STUB_ANSWER, latency: float = 0.0):
+        self.answer = answer
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, messages, stop_sequences=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            # Stand-in for the round trip to the model
+            time.sleep(self.latency)
+        return ChatMessage(role='assistant', content=self.answer)
+
+    def generate(self, messages, stop_sequences=None, **kwargs):
+        return self(messages, stop_sequences=stop_sequences, **kwargs)
+
+@dataclass
+class Timing:
+    name: str
+    runs: int
+    failures: int
+    total: float
+    throughput: float
+    mean: float
+    p50: float
+    p95: float
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+def summarize(name: str, durations: List[float], failures: int = 0) -> Timing:
+    """Throughput and latency percentiles of one scenario's timed runs"""
+    ordered = sorted(durations)
+    total = sum(ordered)
+    timing = Timing(
+        name=name,
+        runs=len(ordered),
+        failures=failures,
+        total=total,
+        throughput=len(ordered) / total if total else 0.0,
+        mean=total / len(ordered) if ordered else 0.0,
+        p50=percentile(ordered, 0.5),
+        p95=percentile(ordered, 0.95)
+    )
+    timing.stages = {
+        stage.name: {'count': stage.count, 'p50': stage.p50, 'p95': stage.p95, 'total': stage.total}
+        for stage in TRACER.summary()
+    }
+    return timing
+
+def fixture_recipe(server: FixtureServer):
+    """The noon.com recipe, pointed at the fixture server"""
+    return replace(
+        RECIPES['noon.com'],
+        site=FIXTURE_SITE,
+        url=server.url('/egypt-en/'),
+        search_url=server.url('/egypt-en/search/?q={query}')
+    )
+
+def _bench_tracking(scenario: str, session: SessionManager, model, product: str,
+                    iterations: int, warmup: int) -> Timing:
+    url_cache = ProductUrlCache(path=None)
+    agent = PriceTrackerAgent(model=model, workers=1, session=session, url_cache=url_cache,
+                              **SCENARIOS[scenario])
+    durations, failures = [], 0
+    try:
+        for i in range(warmup + iterations):
+            if i == warmup:
+                TRACER.reset()
+            if scenario != 'direct':
+                # Every run searches from scratch; 'direct' keeps the page found while warming up
+                url_cache.invalidate(product, FIXTURE_SITE)
+            start = time.perf_counter()
+            result = agent.track_product(product, [FIXTURE_SITE])[0]
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                durations.append(elapsed)
+                failures += 0 if result.price else 1
+    finally:
+        agent.cleanup()
+    return summarize(scenario, durations, failures)
+
+def _bench_listing(server: FixtureServer, session: SessionManager, iterations: int, warmup: int) -> Timing:
+    """Time close_popups and extract_product_info on the fixture results page"""
+    durations, failures = [], 0
+    with session.pool(1).acquire() as browser:
+        browser.ensure_initialized()
+        helium.set_driver(browser.driver)
+        search_url = server.url('/egypt-en/search/?q=iphone')
+        for i in range(warmup + iterations):
+            if i == warmup:
+                TRACER.reset()
+            browser.driver.get(search_url)
+            start = time.perf_counter()
+            with span('close_popups'):
+                listing.close_popups()
+            with span('extract_product_info'):
+                products = listing.extract_product_info()
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                durations.append(elapsed)
+                failures += 0 if products else 1
+    return summarize('listing', durations, failures)
+
+# (thousands separator, decimal separator, currency format, currency, decimals) per locale style
+_PRICE_STYLES = [
+    (',', '.', 'EGP {}', 'EGP', 2),
+    (',', '.', '${}', 'USD', 2),
+    ('.', ',', '{} €', 'EUR', 2),
+    ('\u00a0', ',', '{}\u00a0€', 'EUR', 2),
+    ('\u202f', ',', '{} €', 'EUR', 2),
+    ("'", '.', 'CHF {}', 'CHF', 2),
+    ('٬', '٫', '{} ج.م', 'EGP', 2),
+    (',', '.', 'KWD {}', 'KWD', 3),
+    ('٬', '٫', '{} د.ك', 'KWD', 3),
+]
+_ARABIC_DIGITS = str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')
+
+def _format_price(amount: float, group: str, decimal: str, decimals: int) -> str:
+    text = f"{amount:,.{decimals}f}".replace(',', '\0').replace('.', decimal).replace('\0', group)
+    return text.translate(_ARABIC_DIGITS) if decimal == '٫' else text
+
+def price_cases(count: int, seed: int = 0) -> List[Dict]:
+    """Random prices written out in every locale style, some as ranges, with their expected parse"""
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        group, decimal, template, currency, decimals = rng.choice(_PRICE_STYLES)
+        # Whole amounts drop the decimals, as listings often do
+        whole = rng.random() < 0.3 and decimals == 2
+        # Log-uniform, so amounts below a thousand are as common as large ones
+        low = round(10 ** rng.uniform(0, 6), 0 if whole else decimals)
+        amounts = [low] if rng.random() < 0.8 else [low, round(low * rng.uniform(1.05, 2), 0 if whole else decimals)]
+        text = ' - '.join(template.format(_format_price(amount, group, decimal, 0 if whole else decimals))
+                          for amount in amounts)
+        cases.append({'text': text, 'price': amounts[0], 'currency': currency,
+                      'high': amounts[1] if len(amounts) > 1 else None})
+    return cases
+
+def load_price_corpus(path: str = PRICE_CORPUS) -> List[Dict]:
+    """Hand-checked price cases; a missing corpus is an error, not an empty one"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Price corpus {path} not found")
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _same(got: Optional[float], expected: Optional[float]) -> bool:
+    if got is None or expected is None:
+        return got is expected
+    return math.isclose(got, expected)
+
+def _price_mismatch(case: Dict) -> Optional[str]:
+    parsed = parse_price_info(case['text'])
+    if parsed is None:
+        return f"{case['text']!r}: no price found"
+    if (_same(parsed.amount, case['price']) and parsed.currency == case.get('currency')
+            and _same(parsed.high, case.get('high'))):
+        return None
+    return (f"{case['text']!r}: got {(parsed.amount, parsed.currency, parsed.high)}, "
+            f"expected {(case['price'], case.get('currency'), case.get('high'))}")
+
+def _bench_prices(iterations: int, warmup: int, cases: int = 20000) -> Timing:
+    """Check the parser against the corpus and generated cases, then time bulk parsing
+
+    Every run parses all cases with an empty cache; failures counts the
+    cases that parse to the wrong amount, currency or range end.
+    """
+    corpus = load_price_corpus() + price_cases(cases)
+    mismatches = [message for message in map(_price_mismatch, corpus) if message]
+    for message in mismatches[:10]:
+        print(f"Price mismatch: {message}")
+    texts = [case['text'] for case in corpus]
+    durations = []
+    for i in range(warmup + iterations):
+        if i == warmup:
+            TRACER.reset()
+        parse_price_info.cache_clear()
+        start = time.perf_counter()
+        with span('parse_prices', texts=len(texts)):
+            parse_prices(texts)
+        if i >= warmup:
+            durations.append(time.perf_counter() - start)
+    print(f"Parsed {len(texts)} prices per run, {len(mismatches)} mismatched")
+    return summarize('prices', durations, len(mismatches))
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, marked '+dirty' with uncommitted changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], capture_output=True).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+dirty' if dirty else '')
+
+def run_benchmark(scenarios: List[str], fixtures_dir: str = FIXTURES_DIR, product: str = 'iphone 16 pro',
+                  iterations: int = 20, warmup: int = 1, model_latency: float = 0.0,
+                  block_resources: bool = True) -> List[Timing]:
+    """Time each scenario against the fixture server with a stub model
+
+    One warm browser is shared by every scenario, so Chrome startup is paid
+    during warmup and never timed. The prices scenario needs no browser.
+    """
+    was_enabled = TRACER.enabled
+    TRACER.enabled = True
+    timings = []
+    try:
+        for scenario in scenarios:
+            if scenario in OFFLINE_SCENARIOS:
+                print(f"Benchmarking {scenario} ({iterations} runs)...")
+                timings.append(_bench_prices(iterations, warmup))
+        browser_scenarios = [scenario for scenario in scenarios if scenario not in OFFLINE_SCENARIOS]
+        if browser_scenarios:
+            timings.extend(_bench_browser(browser_scenarios, fixtures_dir, product, iterations, warmup,
+                                          model_latency, block_resources))
+    finally:
+        TRACER.enabled = was_enabled
+    return timings
+
+def _bench_browser(scenarios: List[str], fixtures_dir: str, product: str, iterations: int, warmup: int,
+                   model_latency: float, block_resources: bool) -> List[Timing]:
+    if not os.path.isdir(fixtures_dir):
+        raise FileNotFoundError(f"No recorded pages in {fixtures_dir}; pass the fixtures directory explicitly")
+    server = FixtureServer(fixtures_dir)
+    server.start()
+    RECIPES[FIXTURE_SITE] = fixture_recipe(server)
+    session = SessionManager(headless=True, block_resources=block_resources)
+    model = TracedModel(StubModel(latency=model_latency))
+    timings = []
+    try:
+        for scenario in scenarios:
+            print(f"Benchmarking {scenario} ({iterations} runs)...")
+            if scenario == 'listing':
+                timings.append(_bench_listing(server, session, iterations, warmup))
+            else:
+                timings.append(_bench_tracking(scenario, session, model, product, iterations, warmup))
+    finally:
+        RECIPES.pop(FIXTURE_SITE, None)
+        session.close()
+        server.close()
+    return timings
+
+def format_timings(timings: List[Timing]) -> str:
+    """Scenario totals followed by each scenario's slowest stages"""
+    lines = [f"{'scenario':<10} {'runs':>5} {'failed':>6} {'runs/s':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}"]
+    for timing in timings:
+        lines.append(
+            f"{timing.name:<10} {timing.runs:>5} {timing.failures:>6} {timing.throughput:>8.2f} "
+            f"{timing.mean * 1000:>9.1f} {timing.p50 * 1000:>9.1f} {timing.p95 * 1000:>9.1f}"
+        )
+    for timing in timings:
+        lines.append(f"\n{timing.name} stages")
+        stages = sorted(timing.stages.items(), key=lambda item: item[1]['total'], reverse=True)
+        for name, stage in stages[:8]:
+            lines.append(f"  {name:<26} {stage['count']:>5} {stage['p50'] * 1000:>9.1f} {stage['p95'] * 1000:>9.1f}")
+    return "\n".join(lines)
+
+def record_timings(timings: List[Timing], path: str = RESULTS_PATH, **settings) -> None:
+    """Append a run to the results file, tagged with the current commit"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    record = {
+        'commit': git_commit(),
+        'ts': time.time(),
+        'settings': settings,
+        'scenarios': {timing.name: asdict(timing) for timing in timings}
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def load_timings(path: str = RESULTS_PATH) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+def format_comparison(records: List[Dict], last: int = 10) -> str:
+    """p50/p95 and throughput of each scenario across the last recorded runs"""
+    rows: List[Tuple[str, str, Dict]] = []
+    for record in records[-last:]:
+        for name, timing in record['scenarios'].items():
+            rows.append((record.get('commit') or '?', name, timing))
+    lines = [f"{'commit':<14} {'scenario':<10} {'runs/s':>8} {'p50 ms':>9} {'p95 ms':>9}"]
+    for commit, name, timing in sorted(rows, key=lambda row: row[1]):
+        lines.append(f"{commit:<14} {name:<10} {timing['throughput']:>8.2f} "
+                     f"{timing['p50'] * 1000:>9.1f} {timing['p95'] * 1000:>9.1f}")
+    return "\n".join(lines)
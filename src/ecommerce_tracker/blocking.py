@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# URL patterns for Network.setBlockedURLs; '*' matches any run of characters
+IMAGE_PATTERNS = ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*']
+FONT_PATTERNS = ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*']
+MEDIA_PATTERNS = ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*']
+TRACKER_PATTERNS = [
+    '*doubleclick.net*',
+    '*googlesyndication.com*',
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*googleadservices.com*',
+    '*facebook.net*',
+    '*connect.facebook.com*',
+    '*hotjar.com*',
+    '*criteo.com*',
+    '*criteo.net*',
+    '*tiktok.com/i18n/pixel*',
+    '*snap.licdn.com*',
+    '*bat.bing.com*',
+    '*clarity.ms*',
+]
+
+@dataclass
+class BlockingProfile:
+    """Which requests a site may skip while scraping text"""
+    block_images: bool = True
+    block_fonts: bool = True
+    block_media: bool = True
+    block_trackers: bool = True
+    # Extra patterns to block on this site
+    deny: List[str] = field(default_factory=list)
+    # Patterns from the lists above that this site must not block. Chrome's
+    # blocklist has no exceptions, so a pattern is either dropped whole or kept
+    unblock: List[str] = field(default_factory=list)
+
+    def patterns(self, images: bool = False) -> List[str]:
+        """Blocked URL patterns; images are let through when images is True"""
+        patterns = []
+        if self.block_images and not images:
+            patterns += IMAGE_PATTERNS
+        if self.block_fonts:
+            patterns += FONT_PATTERNS
+        if self.block_media:
+            patterns += MEDIA_PATTERNS
+        if self.block_trackers:
+            patterns += TRACKER_PATTERNS
+        patterns += self.deny
+        return [pattern for pattern in patterns if pattern not in self.unblock]
+
+DEFAULT_PROFILE = BlockingProfile()
+
+# Per-site overrides; sites not listed here use DEFAULT_PROFILE
+SITE_PROFILES: Dict[str, BlockingProfile] = {
+    # Prices, ratings and delivery messages are plain text, so on top of the
+    # defaults only noon's marketing and deep-link SDKs need to go
+    'noon.com': BlockingProfile(
+        deny=[
+            '*braze.com*',
+            '*appboycdn.com*',
+            '*appsflyer.com*',
+            '*branch.io*',
+        ]
+    ),
+}
+
+def profile_for(site: Optional[str]) -> BlockingProfile:
+    """Get the blocking profile for a site"""
+    return SITE_PROFILES.get(site, DEFAULT_PROFILE) if site else DEFAULT_PROFILE
+
+class ResourceBlocker:
+    """Blocks heavy and third-party requests through the Chrome DevTools protocol"""
+
+    def __init__(self, driver, enabled: bool = True):
+        self.driver = driver
+        self.enabled = enabled and hasattr(driver, 'execute_cdp_cmd')
+        self._network_enabled = False
+        self._blocked: Optional[List[str]] = None
+
+    def apply(self, site: Optional[str] = None, images: bool = False) -> None:
+        """Block requests according to the site's profile"""
+        if not self.enabled:
+            return
+        patterns = profile_for(site).patterns(images=images)
+        if patterns == self._blocked:
+            return
+        try:
+            if not self._network_enabled:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self._network_enabled = True
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            self._blocked = patterns
+        except Exception as e:
+            print(f"Could not set up request blocking: {str(e)}")
+            self.enabled = False
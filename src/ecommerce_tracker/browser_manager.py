@@ -1,84 +1,229 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from PIL import Image
-import helium
-from io import BytesIO
-import time
 from smolagents import tool
 import random
 import undetected_chromedriver as uc
 import os
+import json
+import threading
+from .blocking import ResourceBlocker
+from .popups import PopupDismisser, PopupProfileStore
+from .readiness import PageReadiness
+from .screenshots import ScreenshotPipeline
+from .tracing import span
+
+# Resolves a whole {field: [selectors]} map in one round-trip. For every field
+# the selectors are tried in order and the first element with text wins.
+_EXTRACT_FIELDS_SCRIPT = """
+var selectorMap = arguments[0];
+var results = {};
+for (var field in selectorMap) {
+    results[field] = null;
+    var selectors = selectorMap[field];
+    for (var i = 0; i < selectors.length && results[field] === null; i++) {
+        var elements;
+        try { elements = document.querySelectorAll(selectors[i]); } catch (e) { continue; }
+        for (var j = 0; j < elements.length; j++) {
+            var el = elements[j];
+            var text = (el.value !== undefined && el.tagName === 'INPUT')
+                ? el.value : (el.innerText || el.textContent || '');
+            text = text.trim();
+            if (text) { results[field] = text; break; }
+        }
+    }
+}
+return results;
+"""
+
+def extract_page_fields(driver, selector_map: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+    """Get the first matching text for every field in a single script call"""
+    try:
+        with span('extract_fields', fields=len(selector_map)):
+            results = driver.execute_script(_EXTRACT_FIELDS_SCRIPT, selector_map) or {}
+    except Exception as e:
+        print(f"Failed to extract fields: {str(e)}")
+        results = {}
+    return {field: results.get(field) for field in selector_map}
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+]
+
+# Ways of starting Chrome, in the order they are tried by default
+DRIVER_STRATEGIES = ['uc-131', 'uc', 'chromedriver']
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ecommerce_tracker')
+DRIVER_CACHE_PATH = os.path.join(CACHE_DIR, 'driver.json')
+POPUP_PROFILE_PATH = os.path.join(CACHE_DIR, 'popups.json')
+
+# Chrome is started by one thread at a time: undetected-chromedriver patches
+# a shared driver binary and is not safe to run concurrently.
+_STARTUP_LOCK = threading.Lock()
 
 class BrowserManager:
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, screenshot_width: Optional[int] = 1280,
+                 screenshot_clip: Optional[Tuple[float, float, float, float]] = None,
+                 user_data_dir: Optional[str] = None,
+                 driver_cache_path: Optional[str] = DRIVER_CACHE_PATH,
+                 block_resources: bool = True,
+                 popup_store: Optional[PopupProfileStore] = None):
         self.driver = None
+        self.popup_store = popup_store or PopupProfileStore(POPUP_PROFILE_PATH)
         self.headless = headless
+        self.block_resources = block_resources
+        self.blocker = None
+        self.screenshot_width = screenshot_width
+        self.screenshot_clip = screenshot_clip
+        self.user_data_dir = user_data_dir
+        self.driver_cache_path = driver_cache_path
+        self.screenshots = None
         self._close_popups_tool = None
+        self._extract_fields_tool = None
+        self.readiness = None
+        self.popups = None
+
+    def _uc_options(self):
+        # undetected-chromedriver refuses to reuse an options object, so
+        # every attempt builds a fresh one
+        options = uc.ChromeOptions()
+        if self.headless:
+            options.add_argument('--headless=new')
         
-    def initialize(self) -> None:
-        """Initialize the browser with configured options"""
-        try:
-            # First try with undetected-chromedriver
-            options = uc.ChromeOptions()
-            if self.headless:
-                options.add_argument('--headless=new')
-            
-            # Add anti-detection measures
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--start-maximized')
-            options.add_argument('--disable-popup-blocking')
-            options.add_argument('--disable-notifications')
-            options.add_argument('--disable-extensions')
-            
-            # Add random user agent
-            user_agents = [
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
-            ]
-            options.add_argument(f'user-agent={random.choice(user_agents)}')
-            
-            try:
-                print("Initializing undetected-chromedriver...")
-                self.driver = uc.Chrome(options=options, version_main=131)
-                print("Successfully initialized undetected-chromedriver")
-            except Exception as e:
-                print(f"Failed to initialize with version_main=131: {str(e)}")
-                print("Trying without version specification...")
-                self.driver = uc.Chrome(options=options)
-                
-        except Exception as e:
-            print(f"Failed to initialize undetected-chromedriver: {str(e)}")
-            print("Falling back to regular ChromeDriver...")
-            
-            options = Options()
-            if self.headless:
-                options.add_argument('--headless=new')
-            
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--start-maximized')
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            
-            self.driver = webdriver.Chrome(options=options)
+        # Add anti-detection measures
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--start-maximized')
+        options.add_argument('--disable-popup-blocking')
+        options.add_argument('--disable-notifications')
+        options.add_argument('--disable-extensions')
+        if self.user_data_dir:
+            options.add_argument(f'--user-data-dir={self.user_data_dir}')
         
-        print("Setting up helium...")
-        helium.set_driver(self.driver)
+        # Add random user agent
+        options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
+        return options
+
+    def _chrome_options(self) -> Options:
+        options = Options()
+        if self.headless:
+            options.add_argument('--headless=new')
+        
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--start-maximized')
+        if self.user_data_dir:
+            options.add_argument(f'--user-data-dir={self.user_data_dir}')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        return options
+
+    def _start_driver(self, strategy: str):
+        if strategy == 'uc-131':
+            return uc.Chrome(options=self._uc_options(), version_main=131)
+        if strategy == 'uc':
+            return uc.Chrome(options=self._uc_options())
+        return webdriver.Chrome(options=self._chrome_options())
+
+    def _load_cached_strategy(self) -> Optional[str]:
+        if not self.driver_cache_path:
+            return None
+        try:
+            with open(self.driver_cache_path) as f:
+                strategy = json.load(f).get('strategy')
+            return strategy if strategy in DRIVER_STRATEGIES else None
+        except (OSError, ValueError):
+            return None
+
+    def _save_cached_strategy(self, strategy: str) -> None:
+        if not self.driver_cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.driver_cache_path), exist_ok=True)
+            with open(self.driver_cache_path, 'w') as f:
+                json.dump({'strategy': strategy}, f)
+        except OSError as e:
+            print(f"Could not cache driver strategy: {str(e)}")
+
+    def initialize(self) -> None:
+        """Initialize the browser with configured options
+
+        The strategy that last started Chrome successfully is cached on disk
+        and tried first, so later startups skip the attempts known to fail.
+        """
+        cached = self._load_cached_strategy()
+        strategies = DRIVER_STRATEGIES
+        if cached:
+            strategies = [cached] + [s for s in DRIVER_STRATEGIES if s != cached]
+
+        errors = []
+        with _STARTUP_LOCK:
+            for strategy in strategies:
+                try:
+                    print(f"Initializing Chrome with {strategy}...")
+                    with span('chrome.start', strategy=strategy):
+                        self.driver = self._start_driver(strategy)
+                    print(f"Successfully initialized Chrome with {strategy}")
+                    if strategy != cached:
+                        self._save_cached_strategy(strategy)
+                    break
+                except Exception as e:
+                    print(f"Failed to initialize with {strategy}: {str(e)}")
+                    errors.append(f"{strategy}: {str(e)}")
+            else:
+                raise RuntimeError("Could not start Chrome: " + "; ".join(errors))
+
+        self.readiness = PageReadiness(self.driver)
+        self.screenshots = ScreenshotPipeline(
+            self.driver, max_width=self.screenshot_width, clip=self.screenshot_clip
+        )
+        self.blocker = ResourceBlocker(self.driver, enabled=self.block_resources)
+        self.blocker.apply()
         
         print("Creating popup tool...")
-        self._close_popups_tool = create_close_popups_tool(self.driver)
+        self.popups = PopupDismisser(self.driver, store=self.popup_store)
+        self._close_popups_tool = create_close_popups_tool(self.driver, store=self.popup_store)
+        self._extract_fields_tool = create_extract_fields_tool(self.driver)
         
+    def ensure_initialized(self) -> None:
+        """Start the browser if it has not been started yet"""
+        if self.driver is None:
+            self.initialize()
+
     @property
     def close_popups_tool(self):
         """Get the close popups tool configured with current driver"""
         return self._close_popups_tool
+
+    @property
+    def extract_fields_tool(self):
+        """Get the extract fields tool configured with current driver"""
+        return self._extract_fields_tool
+
+    def close_popups(self, site: Optional[str] = None) -> List[str]:
+        """Close visible popups in one script call, returning the selectors that fired"""
+        return self.popups.dismiss(site) if self.popups else []
+
+    def apply_blocking(self, site: Optional[str] = None, images: bool = False) -> None:
+        """Block images, fonts, media and trackers according to the site's profile
+
+        Pass images=True when the page will be shown to the vision model.
+        """
+        if self.blocker:
+            self.blocker.apply(site, images=images)
+
+    def extract_fields(self, selector_map: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        """Get the first matching text for every field in one round-trip"""
+        if not self.driver:
+            return {field: None for field in selector_map}
+        return extract_page_fields(self.driver, selector_map)
         
     def wait_and_find_element(self, selector: str, timeout: int = 10) -> Optional[webdriver.remote.webelement.WebElement]:
         """Wait for and find an element using a CSS selector"""
@@ -97,57 +242,63 @@ class BrowserManager:
         """Get current URL for debugging"""
         return self.driver.current_url if self.driver else ""
         
-    def capture_screenshot(self) -> Optional[Image.Image]:
-        """Capture screenshot of current page"""
+    def capture_screenshot(self, skip_duplicates: bool = False) -> Optional[Image.Image]:
+        """Capture screenshot of current page, or None if skip_duplicates is set and it has not changed"""
         if not self.driver:
             return None
-            
-        time.sleep(1.0)  # Allow for animations
-        png_bytes = self.driver.get_screenshot_as_png()
-        return Image.open(BytesIO(png_bytes))
+        with span('screenshot'):
+            return self.screenshots.capture(skip_duplicates=skip_duplicates)
+        
+    def is_alive(self) -> bool:
+        """Check that the browser still responds"""
+        if not self.driver:
+            return False
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def restart(self) -> None:
+        """Replace a crashed or wedged browser with a fresh one"""
+        print("Restarting browser...")
+        self.cleanup()
+        self.initialize()
         
     def cleanup(self):
         """Clean up resources"""
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+
+def create_extract_fields_tool(driver: webdriver.Chrome):
+    """Create an extract fields tool configured with the given driver"""
+    @tool
+    def extract_fields(selectors: dict) -> dict:
+        """Extract the text of several fields from the current page in one call.
+
+        Args:
+            selectors: Maps each field name to a list of CSS selectors tried in order (e.g. {'price': ['div.priceNow', 'span.price']})
+
+        Returns:
+            dict: Maps each field name to the first matching text, or None if nothing matched
+        """
+        return extract_page_fields(driver, selectors)
 
-def create_close_popups_tool(driver: webdriver.Chrome):
+    return extract_fields
+
+def create_close_popups_tool(driver: webdriver.Chrome, store: Optional[PopupProfileStore] = None):
     """Create a close popups tool configured with the given driver"""
+    dismisser = PopupDismisser(driver, store=store)
+
     @tool
     def close_popups() -> str:
         """Close common modal popups and overlays on the current page."""
-        modal_selectors = [
-            "[role='dialog']",
-            "button[class*='close']",
-            "[class*='modal']",
-            "[class*='modal'] button",
-            "[class*='CloseButton']",
-            "[aria-label*='close']",
-            ".modal-close",
-            ".modal-overlay",
-            "[class*='overlay']"
-        ]
-        
-        wait = WebDriverWait(driver, timeout=0.5)
-        
-        for selector in modal_selectors:
-            try:
-                elements = wait.until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                )
-                for element in elements:
-                    if element.is_displayed():
-                        driver.execute_script("arguments[0].click();", element)
-            except Exception:
-                continue
-                
-        # Try closing with Escape key
-        from selenium.webdriver.common.keys import Keys
-        try:
-            driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
-        except:
-            pass
-            
-        return "Attempted to close popups"
+        fired = dismisser.dismiss()
+        if fired:
+            return f"Closed popups matching: {', '.join(fired)}"
+        return "No popups found"
     
-    return close_popups 
\ No newline at end of file
+    return close_popups
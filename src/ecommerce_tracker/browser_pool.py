@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from queue import Queue
+import os
+from typing import List, Optional, Tuple
+from .browser_manager import POPUP_PROFILE_PATH, BrowserManager
+from .popups import PopupProfileStore
+from .tracing import span
+
+class BrowserPool:
+    """A fixed-size pool of BrowserManager instances shared by worker threads"""
+
+    def __init__(self, size: int = 1, headless: bool = True, profile_dir: Optional[str] = None,
+                 block_resources: bool = True, screenshot_width: Optional[int] = 1280,
+                 screenshot_clip: Optional[Tuple[float, float, float, float]] = None):
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1")
+        self.size = size
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.block_resources = block_resources
+        self.screenshot_width = screenshot_width
+        self.screenshot_clip = screenshot_clip
+        # One shared store, so popup profiles learned by any browser reach all of them
+        self.popup_store = PopupProfileStore(POPUP_PROFILE_PATH)
+        self.restarts = 0
+        self.browsers: List[BrowserManager] = []
+        self._idle: Queue = Queue()
+
+    def grow(self, size: int) -> None:
+        """Add browsers until the pool holds at least size of them
+
+        New browsers are not started until a worker first needs one, so work
+        that never touches the browser never pays for Chrome startup.
+        """
+        self.size = max(self.size, size)
+        for index in range(len(self.browsers), self.size):
+            # Chrome locks its profile, so every browser gets its own directory
+            user_data_dir = os.path.join(self.profile_dir, f"browser-{index}") if self.profile_dir else None
+            browser = BrowserManager(
+                headless=self.headless,
+                screenshot_width=self.screenshot_width,
+                screenshot_clip=self.screenshot_clip,
+                user_data_dir=user_data_dir,
+                block_resources=self.block_resources,
+                popup_store=self.popup_store
+            )
+            self.browsers.append(browser)
+            self._idle.put(browser)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow an idle browser, blocking until one is available
+
+        Browsers that stopped responding are restarted before being handed out.
+        """
+        with span('browser.acquire'):
+            browser = self._idle.get()
+        try:
+            if browser.driver is not None and not browser.is_alive():
+                self.restarts += 1
+                with span('browser.restart'):
+                    browser.restart()
+            yield browser
+        finally:
+            self._idle.put(browser)
+
+    def cleanup(self) -> None:
+        """Shut down every browser in the pool"""
+        for browser in self.browsers:
+            try:
+                browser.cleanup()
+            except Exception as e:
+                print(f"Error shutting down browser: {str(e)}")
+        self.browsers = []
+        self._idle = Queue()
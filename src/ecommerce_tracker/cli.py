@@ -1,21 +1,37 @@
 import click
-from typing import List
+from functools import partial
+from typing import List, Optional, Tuple
 import os
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 from .price_tracker_agent import PriceTrackerAgent
+from .batch import read_products, run_batch, run_scheduled
+from . import benchmark as bench
+from .history import PriceHistory
+from .metrics import MetricsServer, TrackerMetrics
+from .model_cache import CachedModel
+from .results import ResultRow, ResultSet
+from .scheduler import Scheduler
+from .screenshots import ScreenshotWriter
+from .session import SessionManager
+from .sharded import run_sharded
+from .sinks import SINKS, JsonlSink, open_sink
+from .tracing import TRACER, TracedModel
+from .work_queue import WorkQueue
 from smolagents import OpenAIServerModel
 
 # Load environment variables from .env file
 load_dotenv()
 
-@click.command()
-@click.argument('product_name')
-@click.option('--sites', '-s', multiple=True, help='E-commerce sites to check')
-@click.option('--output-dir', '-o', default='reports', help='Directory to save reports')
-def track_prices(product_name: str, sites: List[str], output_dir: str):
-    """Track prices for a product across e-commerce sites"""
-    
+DEFAULT_SITES = ['amazon.com', 'walmart.com', 'target.com']
+
+def create_model(cache: bool = True):
+    """Create the vision model client from the environment
+
+    With cache enabled, responses are replayed from the on-disk model cache
+    whenever the same page is seen again.
+    """
     # Verify API key is set
     api_key = os.getenv("FIREWORKS_API_KEY")
     if not api_key:
@@ -23,9 +39,6 @@ def track_prices(product_name: str, sites: List[str], output_dir: str):
             "FIREWORKS_API_KEY not found. Please set it in your .env file or environment variables."
         )
     
-    if not sites:
-        sites = ['amazon.com', 'walmart.com', 'target.com']  # Default sites
-        
     # Initialize model with specific configuration
     model = OpenAIServerModel(
         api_key=api_key,
@@ -34,42 +47,359 @@ def track_prices(product_name: str, sites: List[str], output_dir: str):
         max_tokens=2048,
         temperature=0.7
     )
+    # Cache hits never reach the traced model, so 'llm' spans are real calls
+    model = TracedModel(model)
+    return CachedModel(model) if cache else model
+
+def close_model(model) -> None:
+    """Report model cache hits and close the cache, if the model has one"""
+    if isinstance(model, CachedModel):
+        stats = model.stats()
+        if stats['hits'] or stats['misses']:
+            click.echo(f"Model cache: {stats['hits']} hits, {stats['misses']} misses "
+                       f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} cached responses)")
+        model.close()
+
+def echo_price_drops(history: PriceHistory) -> None:
+    """Print the price drops recorded in the latest run"""
+    for drop in history.price_drops():
+        click.echo(f"Price drop: {drop.product} on {drop.site}: "
+                   f"{drop.previous_price:.2f} -> {drop.price:.2f}")
+
+def write_report(agent: PriceTrackerAgent, product_name: str, sites: List[str], output_dir: str,
+                 output_format: str, fsync_interval: float, history_path: str) -> None:
+    """Track a product once and write the report, screenshots and history"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = os.path.join(output_dir, f"report_{timestamp}.{output_format}")
     
-    agent = PriceTrackerAgent(model=model)
+    sink_options = {'title': product_name} if output_format == 'txt' else {}
+    # Screenshots are written out as results arrive; only paths are kept. The
+    # writer is closed even if tracking fails, so queued encodes still finish
+    with ScreenshotWriter() as screenshot_writer:
+        results = ResultSet(
+            screenshot_dir=output_dir,
+            screenshot_prefix=f"screenshot_{timestamp}",
+            screenshot_writer=screenshot_writer
+        )
+        with open_sink(report_path, output_format, fsync_interval=fsync_interval, **sink_options) as sink:
+            agent.track_product(
+                product_name,
+                sites,
+                on_result=lambda result: sink.write(results.append(product_name, result))
+            )
     
+    if history_path:
+        record_history(history_path, [(row.product, row) for row in results])
+                
+    click.echo(f"Report generated: {report_path}")
+
+def start_trace(trace_path: str) -> None:
+    """Start recording spans if a trace file was asked for"""
+    if trace_path:
+        TRACER.reset()
+        TRACER.enabled = True
+
+def finish_trace(trace_path: str) -> None:
+    """Write the trace file and print the per-stage summary"""
+    if not trace_path:
+        return
+    TRACER.enabled = False
+    TRACER.export(trace_path)
+    click.echo(TRACER.format_summary())
+    click.echo(f"Trace written: {trace_path}")
+
+def parse_site_rates(values: List[str]) -> dict:
+    """Parse 'site=checks per minute' pairs"""
+    rates = {}
+    for value in values:
+        site, _, rate = value.partition('=')
+        try:
+            rates[site.strip()] = float(rate)
+        except ValueError:
+            rates[site.strip()] = 0
+        if not site.strip() or rates[site.strip()] <= 0:
+            raise click.BadParameter(f"expected site=checks per minute, got {value!r}", param_hint='--site-rate')
+    return rates
+
+def parse_clip(value: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Parse an 'x,y,width,height' screenshot region in CSS pixels"""
+    if not value:
+        return None
     try:
-        results = agent.track_product(product_name, sites)
+        x, y, width, height = (float(part) for part in value.split(','))
+    except ValueError:
+        raise click.BadParameter(f"expected x,y,width,height, got {value!r}", param_hint='--screenshot-clip')
+    if width <= 0 or height <= 0:
+        raise click.BadParameter(f"width and height must be positive, got {value!r}", param_hint='--screenshot-clip')
+    return x, y, width, height
+
+def record_history(history_path: str, rows) -> None:
+    """Append (product, result) pairs to the price history as one run"""
+    history = PriceHistory(history_path)
+    try:
+        history.start_run()
+        history.append_many(rows)
+        echo_price_drops(history)
+    finally:
+        history.close()
+
+@click.command()
+@click.argument('product_name')
+@click.option('--sites', '-s', multiple=True, help='E-commerce sites to check')
+@click.option('--output-dir', '-o', default='reports', help='Directory to save reports')
+@click.option('--workers', '-w', default=1, type=click.IntRange(min=1), help='Number of browsers used to check sites in parallel')
+@click.option('--agent-only', is_flag=True, help='Always use the vision agent, even for sites with a known recipe')
+@click.option('--history', 'history_path', default=None, help='SQLite price history database to append results to')
+@click.option('--format', '-f', 'output_format', default='txt', type=click.Choice(list(SINKS)), help='Report format')
+@click.option('--fsync-interval', default=None, type=float, help='Seconds between fsyncs of the report while results stream in')
+@click.option('--profile-dir', default=None, help='Directory of persistent Chrome profiles that keep cookies and consent state between runs')
+@click.option('--block-resources/--no-block-resources', default=True, help='Skip images, fonts, media and trackers unless the vision agent needs them')
+@click.option('--http-first/--no-http-first', default=True, help='Read prices embedded in the page over plain HTTP before starting the browser')
+@click.option('--model-cache/--no-model-cache', default=True, help='Replay cached model responses for pages that have not changed')
+@click.option('--incremental', is_flag=True, help='Re-check product pages remembered in --history directly and only fully scrape changed ones')
+@click.option('--trace', 'trace_path', default=None, help='Write per-stage timing spans here: Chrome trace format for .json, JSONL otherwise')
+@click.option('--daemon', is_flag=True, help='Keep tracking the product every --interval seconds and serve metrics')
+@click.option('--interval', default=3600.0, type=click.FloatRange(min=0), help='Seconds between tracking cycles in daemon mode')
+@click.option('--metrics-port', default=9108, type=int, help='Port of the Prometheus metrics endpoint in daemon mode')
+@click.option('--screenshot-width', default=1280, type=click.IntRange(min=0), help='Width screenshots are scaled down to before they reach the model; 0 keeps full resolution')
+@click.option('--screenshot-clip', default=None, help='Only capture this page region, as x,y,width,height in CSS pixels')
+def track_prices(product_name: str, sites: List[str], output_dir: str, workers: int, agent_only: bool,
+                 history_path: str, output_format: str, fsync_interval: float, profile_dir: str,
+                 block_resources: bool, http_first: bool, model_cache: bool, incremental: bool,
+                 trace_path: str, daemon: bool, interval: float, metrics_port: int,
+                 screenshot_width: int, screenshot_clip: str):
+    """Track prices for a product across e-commerce sites"""
+    
+    if not sites:
+        sites = DEFAULT_SITES
+    clip = parse_clip(screenshot_clip)
+    if incremental and not history_path:
+        raise click.UsageError("--incremental needs a --history database")
         
+    start_trace(trace_path)
+    model = create_model(cache=model_cache)
+    session = SessionManager(profile_dir=profile_dir, block_resources=block_resources,
+                             screenshot_width=screenshot_width or None, screenshot_clip=clip)
+    pages = PriceHistory(history_path) if incremental else None
+    agent = PriceTrackerAgent(model=model, workers=min(workers, len(sites)), fast_path=not agent_only,
+                              session=session, http_first=http_first, history=pages)
+    metrics_server = None
+    
+    try:
         # Create report directory
         os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save report
-        report_path = os.path.join(output_dir, f"report_{timestamp}.txt")
-        with open(report_path, 'w') as f:
-            f.write(f"Price Report for: {product_name}\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            for result in results:
-                f.write(f"\nSite: {result.site}\n")
-                f.write(f"Price: ${result.price:.2f}\n")
-                f.write(f"Availability: {result.availability}\n")
-                if result.seller_rating:
-                    f.write(f"Seller Rating: {result.seller_rating}/5.0\n")
-                    
-                # Save screenshot
-                if result.screenshot:
-                    screenshot_path = os.path.join(
-                        output_dir, 
-                        f"screenshot_{timestamp}_{result.site.replace('.', '_')}.png"
-                    )
-                    result.screenshot.save(screenshot_path)
-                    f.write(f"Screenshot saved: {screenshot_path}\n")
-                    
-        click.echo(f"Report generated: {report_path}")
-        
+        if not daemon:
+            write_report(agent, product_name, sites, output_dir, output_format, fsync_interval, history_path)
+            return
+
+        metrics = TrackerMetrics()
+        TRACER.listeners.append(metrics.observe_span)
+        metrics.watch_pool(agent.pool)
+        metrics_server = MetricsServer(metrics.registry, port=metrics_port)
+        metrics_server.start()
+        click.echo(f"Serving metrics on {metrics_server.url}; press Ctrl+C to stop")
+        while True:
+            started = time.time()
+            try:
+                write_report(agent, product_name, sites, output_dir, output_format, fsync_interval, history_path)
+                metrics.record_cycle(1, time.time() - started)
+            except Exception as e:
+                # One bad cycle must not stop the daemon
+                click.echo(f"Tracking cycle failed: {str(e)}", err=True)
+            if trace_path:
+                # The trace file holds the latest cycle, so spans never pile up
+                finish_trace(trace_path)
+                start_trace(trace_path)
+            elapsed = time.time() - started
+            time.sleep(max(0.0, interval - elapsed))
+    
+    except KeyboardInterrupt:
+        click.echo("Stopping")
+    finally:
+        if metrics_server:
+            metrics_server.close()
+        agent.cleanup()
+        session.close()
+        close_model(model)
+        finish_trace(trace_path)
+        if pages:
+            pages.close()
+
+@click.command()
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', default='results.jsonl', help='JSONL file results are appended to')
+@click.option('--sites', '-s', multiple=True, help='Sites to check for products that do not list their own')
+@click.option('--workers', '-w', default=1, type=click.IntRange(min=1), help='Number of browsers used to check sites in parallel')
+@click.option('--resume/--no-resume', default=True, help='Skip products already present in the output file')
+@click.option('--concurrency', '-c', default=8, type=click.IntRange(min=1), help='Number of products tracked at the same time')
+@click.option('--agent-only', is_flag=True, help='Always use the vision agent, even for sites with a known recipe')
+@click.option('--history', 'history_path', default=None, help='SQLite price history database to append results to')
+@click.option('--fsync-interval', default=None, type=float, help='Seconds between fsyncs of the output file')
+@click.option('--profile-dir', default=None, help='Directory of persistent Chrome profiles that keep cookies and consent state between runs')
+@click.option('--block-resources/--no-block-resources', default=True, help='Skip images, fonts, media and trackers unless the vision agent needs them')
+@click.option('--http-first/--no-http-first', default=True, help='Read prices embedded in the page over plain HTTP before starting the browser')
+@click.option('--model-cache/--no-model-cache', default=True, help='Replay cached model responses for pages that have not changed')
+@click.option('--incremental', is_flag=True, help='Re-check product pages remembered in --history directly and only fully scrape changed ones')
+@click.option('--trace', 'trace_path', default=None, help='Write per-stage timing spans here: Chrome trace format for .json, JSONL otherwise')
+@click.option('--schedule', is_flag=True, help='Keep re-checking every product, more often the more its price moves')
+@click.option('--min-interval', default=900.0, type=click.FloatRange(min=0, min_open=True), help='Seconds between checks of the most volatile products in --schedule mode')
+@click.option('--max-interval', default=86400.0, type=click.FloatRange(min=0, min_open=True), help='Seconds between checks of products whose price never moves in --schedule mode')
+@click.option('--rate', default=6.0, type=click.FloatRange(min=0, min_open=True), help='Checks per minute allowed on each site in --schedule mode')
+@click.option('--site-rate', 'site_rates', multiple=True, help='Per-site override of --rate, as site=checks per minute')
+@click.option('--screenshot-width', default=1280, type=click.IntRange(min=0), help='Width screenshots are scaled down to before they reach the model; 0 keeps full resolution')
+@click.option('--screenshot-clip', default=None, help='Only capture this page region, as x,y,width,height in CSS pixels')
+def track_batch(input_file: str, output: str, sites: List[str], workers: int, resume: bool, concurrency: int,
+                agent_only: bool, history_path: str, fsync_interval: float, profile_dir: str,
+                block_resources: bool, http_first: bool, model_cache: bool, incremental: bool,
+                trace_path: str, schedule: bool, min_interval: float, max_interval: float,
+                rate: float, site_rates: List[str], screenshot_width: int, screenshot_clip: str):
+    """Track every product listed in a CSV or JSONL file"""
+    
+    sites = list(sites) or DEFAULT_SITES
+    if incremental and not history_path:
+        raise click.UsageError("--incremental needs a --history database")
+    if min_interval > max_interval:
+        raise click.UsageError("--min-interval must not exceed --max-interval")
+    site_rates = parse_site_rates(site_rates)
+    clip = parse_clip(screenshot_clip)
+    start_trace(trace_path)
+    model = create_model(cache=model_cache)
+    session = SessionManager(profile_dir=profile_dir, block_resources=block_resources,
+                             screenshot_width=screenshot_width or None, screenshot_clip=clip)
+    history = PriceHistory(history_path) if history_path else None
+    agent = PriceTrackerAgent(model=model, workers=workers, fast_path=not agent_only, session=session,
+                              http_first=http_first, history=history if incremental else None)
+    
+    try:
+        if schedule:
+            # Seeded from the history, so a restarted scheduler keeps each product's cadence
+            scheduler = Scheduler(history=history, min_interval=min_interval, max_interval=max_interval,
+                                  default_interval=min(max(3600.0, min_interval), max_interval),
+                                  default_rate=rate, site_rates=site_rates)
+            run_scheduled(agent, scheduler, input_file, output, sites, history=history,
+                          fsync_interval=fsync_interval, concurrency=concurrency)
+            return
+        if history:
+            history.start_run()
+        written = run_batch(agent, input_file, output, sites, resume=resume, history=history,
+                            fsync_interval=fsync_interval, concurrency=concurrency)
+        click.echo(f"Wrote {written} results to {output}")
+        if history:
+            echo_price_drops(history)
+    except KeyboardInterrupt:
+        click.echo("Stopping")
     finally:
         agent.cleanup()
+        session.close()
+        close_model(model)
+        finish_trace(trace_path)
+        if history:
+            history.close()
+
+@click.command()
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--queue', 'queue_path', default='jobs.db', help='SQLite work queue; hosts sharing this file share the job')
+@click.option('--output', '-o', default='results.jsonl', help='JSONL file every finished result is written to at the end')
+@click.option('--sites', '-s', multiple=True, help='Sites to check for products that do not list their own')
+@click.option('--processes', '-p', default=max(1, (os.cpu_count() or 2) // 2), type=click.IntRange(min=1), help='Worker processes on this host, each with its own browsers and model client')
+@click.option('--workers', '-w', default=1, type=click.IntRange(min=1), help='Browsers per worker process')
+@click.option('--concurrency', '-c', default=8, type=click.IntRange(min=1), help='Jobs each worker process leases and tracks at a time')
+@click.option('--lease', 'lease_seconds', default=900.0, type=click.FloatRange(min=10), help='Seconds before the jobs of an unresponsive worker go back to the queue')
+@click.option('--max-attempts', default=3, type=click.IntRange(min=1), help='Leases before a job that keeps failing is given up')
+@click.option('--agent-only', is_flag=True, help='Always use the vision agent, even for sites with a known recipe')
+@click.option('--history', 'history_path', default=None, help='SQLite price history database to append results to')
+@click.option('--profile-dir', default=None, help='Directory of persistent Chrome profiles; each worker process gets its own subdirectory')
+@click.option('--block-resources/--no-block-resources', default=True, help='Skip images, fonts, media and trackers unless the vision agent needs them')
+@click.option('--http-first/--no-http-first', default=True, help='Read prices embedded in the page over plain HTTP before starting the browser')
+@click.option('--model-cache/--no-model-cache', default=True, help='Replay cached model responses for pages that have not changed')
+@click.option('--screenshot-width', default=1280, type=click.IntRange(min=0), help='Width screenshots are scaled down to before they reach the model; 0 keeps full resolution')
+@click.option('--screenshot-clip', default=None, help='Only capture this page region, as x,y,width,height in CSS pixels')
+def track_sharded(input_file: str, queue_path: str, output: str, sites: List[str], processes: int, workers: int,
+                  concurrency: int, lease_seconds: float, max_attempts: int, agent_only: bool, history_path: str,
+                  profile_dir: str, block_resources: bool, http_first: bool, model_cache: bool,
+                  screenshot_width: int, screenshot_clip: str):
+    """Track a catalogue with several worker processes pulling from a shared queue"""
+    
+    sites = list(sites) or DEFAULT_SITES
+    clip = parse_clip(screenshot_clip)
+    # Fail here rather than in every worker process
+    create_model(cache=False)
+    queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    try:
+        # Every host may enqueue the same file; jobs already queued are skipped
+        added = queue.enqueue(
+            ((item.product, site) for item in read_products(input_file) for site in (item.sites or sites)),
+            shards=processes
+        )
+        click.echo(f"Queued {added} new jobs in {queue_path}")
+    finally:
+        queue.close()
+
+    try:
+        stats = run_sharded(
+            queue_path, processes,
+            model_factory=partial(create_model, cache=model_cache),
+            agent_options={'workers': workers, 'fast_path': not agent_only, 'http_first': http_first,
+                           'model_concurrency': workers},
+            session_options={'profile_dir': os.path.abspath(profile_dir) if profile_dir else None,
+                             'block_resources': block_resources,
+                             'screenshot_width': screenshot_width or None,
+                             'screenshot_clip': clip},
+            concurrency=concurrency, lease_seconds=lease_seconds, max_attempts=max_attempts
+        )
+    except KeyboardInterrupt:
+        click.echo("Stopping; unfinished jobs stay queued for the next run")
+        return
+    click.echo(f"{stats.done} jobs done, {stats.failed} failed, {stats.remaining} left")
+
+    queue = WorkQueue(queue_path)
+    history = PriceHistory(history_path) if history_path else None
+    try:
+        rows = [ResultRow(**record) for _, record in queue.results()]
+        with JsonlSink(output) as sink:
+            for row in rows:
+                sink.write(row)
+        click.echo(f"Wrote {len(rows)} results to {output}")
+        if history:
+            history.start_run()
+            history.append_many((row.product, row) for row in rows)
+            echo_price_drops(history)
+    finally:
+        queue.close()
+        if history:
+            history.close()
+
+@click.command()
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(bench.SCENARIOS)), help='Scenarios to time (default: all)')
+@click.option('--fixtures', default=bench.FIXTURES_DIR, type=click.Path(file_okay=False), help='Directory of recorded pages to replay')
+@click.option('--iterations', '-n', default=20, type=click.IntRange(min=1), help='Timed runs per scenario')
+@click.option('--warmup', default=1, type=click.IntRange(min=0), help='Untimed runs per scenario before timing starts')
+@click.option('--product', default='iphone 16 pro', help='Product searched for on the fixture site')
+@click.option('--model-latency', default=0.0, type=click.FloatRange(min=0), help='Seconds the stub model waits before answering')
+@click.option('--block-resources/--no-block-resources', default=True, help='Skip images, fonts, media and trackers unless the vision agent needs them')
+@click.option('--results', 'results_path', default=bench.RESULTS_PATH, help='JSONL file each run is appended to, tagged with the commit')
+@click.option('--compare', is_flag=True, help='Only print the recorded runs side by side')
+def benchmark(scenarios: List[str], fixtures: str, iterations: int, warmup: int, product: str,
+              model_latency: float, block_resources: bool, results_path: str, compare: bool):
+    """Time tracking against recorded pages served locally, with a stub model"""
+    
+    timings = []
+    if not compare:
+        scenarios = list(scenarios) or list(bench.SCENARIOS)
+        try:
+            timings = bench.run_benchmark(scenarios, fixtures_dir=fixtures, product=product, iterations=iterations,
+                                          warmup=warmup, model_latency=model_latency,
+                                          block_resources=block_resources)
+        except FileNotFoundError as e:
+            raise click.ClickException(str(e))
+        click.echo(bench.format_timings(timings))
+        bench.record_timings(timings, results_path, iterations=iterations, warmup=warmup,
+                             model_latency=model_latency, block_resources=block_resources)
+        click.echo(f"\nResults appended to {results_path}\n")
+    click.echo(bench.format_comparison(bench.load_timings(results_path)))
+    wrong = [timing for timing in timings if timing.name in bench.CHECKED_SCENARIOS and timing.failures]
+    if wrong:
+        raise click.ClickException(", ".join(f"{timing.name}: {timing.failures} wrong results" for timing in wrong))
 
 if __name__ == '__main__':
     track_prices() 
\ No newline at end of file
@@ -0,0 +1,105 @@
+from typing import Callable, Dict, List, Optional
+from .readiness import PageReadiness
+from .recipes import NOON_NEXT_PAGE, NOON_TILE_CONTAINER, NOON_TILE_FIELDS, find_link
+from .tiles import TileColumns, extract_tiles
+from .tracing import span
+from .url_cache import relevance
+
+_SCROLL_SCRIPT = "window.scrollTo(0, document.body.scrollHeight);"
+
+class ResultsCrawler:
+    """Collects the product tiles of a results listing, across infinite scroll and pages.
+
+    New tiles are read in batches as they load and handed to on_tiles right
+    away. The crawler scrolls only while scrolling still loads tiles, then
+    follows the next-page link, and stops early once max_results tiles are
+    collected or, with a query, once irrelevant_run tiles in a row score
+    below min_relevance (listings are sorted best match first).
+    """
+
+    def __init__(self, driver, readiness: Optional[PageReadiness] = None,
+                 container_selector: str = NOON_TILE_CONTAINER,
+                 fields: Dict[str, List[str]] = NOON_TILE_FIELDS,
+                 next_page: List[str] = NOON_NEXT_PAGE,
+                 max_results: Optional[int] = None, max_pages: int = 10,
+                 query: Optional[str] = None, min_relevance: float = 0.5,
+                 irrelevant_run: int = 10, load_timeout: float = 3):
+        self.driver = driver
+        self.readiness = readiness or PageReadiness(driver)
+        self.container_selector = container_selector
+        self.fields = fields
+        self.next_page = next_page
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.query = query
+        self.min_relevance = min_relevance
+        self.irrelevant_run = irrelevant_run
+        self.load_timeout = load_timeout
+        self._irrelevant = 0
+
+    def _relevance_cutoff(self, tiles: TileColumns, collected: int) -> Optional[int]:
+        """Total number of tiles to keep if this batch completes an irrelevant run, else None"""
+        if not self.query:
+            return None
+        for i, name in enumerate(tiles.names):
+            if relevance(self.query, name) >= self.min_relevance:
+                self._irrelevant = 0
+                continue
+            self._irrelevant += 1
+            if self._irrelevant >= self.irrelevant_run:
+                # The whole run goes, including its start in earlier batches
+                return max(0, collected + i + 1 - self._irrelevant)
+        return None
+
+    def _follow_next_page(self) -> bool:
+        try:
+            url = find_link(self.driver, self.next_page)
+        except Exception as e:
+            print(f"Could not find the next results page: {str(e)}")
+            return False
+        if not url or url == self.driver.current_url:
+            return False
+        print(f"Following next results page {url}...")
+        with span('navigate', page='next'):
+            self.driver.get(url)
+        return self.readiness.wait_until_ready(self.container_selector, timeout=self.load_timeout * 3)
+
+    def crawl(self, on_tiles: Optional[Callable[[TileColumns], None]] = None) -> TileColumns:
+        """Read every tile of the listing, stopping as early as the limits allow"""
+        collected = TileColumns()
+        self._irrelevant = 0
+        pages, known = 1, 0
+        with span('crawl') as attrs:
+            while True:
+                tiles = extract_tiles(self.driver, self.container_selector, self.fields, start=known)
+                known += len(tiles)
+                done = False
+                if self.max_results is not None and len(collected) + len(tiles) >= self.max_results:
+                    tiles = tiles.slice(self.max_results - len(collected))
+                    done = True
+                keep = self._relevance_cutoff(tiles, len(collected))
+                if keep is not None:
+                    print(f"Stopping after {self.irrelevant_run} results that do not match {self.query!r}")
+                    # Tiles of the run already handed to on_tiles cannot be taken back
+                    tiles = tiles.slice(max(0, keep - len(collected)))
+                    collected = collected.slice(keep)
+                    done = True
+                if len(tiles):
+                    collected.extend(tiles)
+                    if on_tiles:
+                        on_tiles(tiles)
+                if done:
+                    break
+
+                # Scroll only while it keeps loading tiles, then try the next page
+                self.driver.execute_script(_SCROLL_SCRIPT)
+                if self.readiness.wait_for_count(self.container_selector, known, timeout=self.load_timeout) > known:
+                    continue
+                if pages < self.max_pages and self._follow_next_page():
+                    pages += 1
+                    known = 0
+                    continue
+                break
+            attrs.update(tiles=len(collected), pages=pages)
+        print(f"Collected {len(collected)} results from {pages} page(s)")
+        return collected
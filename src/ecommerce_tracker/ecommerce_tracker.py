@@ -1,23 +1,25 @@
 import sys
 import codecs
-import pandas as pd
 from datetime import datetime
 import helium
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium import webdriver
 from time import sleep
-from PIL import Image
-import io
 import os
 from dotenv import load_dotenv
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from smolagents import CodeAgent, tool, OpenAIServerModel
 from smolagents.agents import ActionStep
+from .crawler import ResultsCrawler
+from .recipes import NOON_TILE_CONTAINER
+from .results import result_row
+from .screenshots import ScreenshotPipeline, ScreenshotWriter
+from .sinks import XlsxSink
+from .tiles import TileColumns, extract_tiles
 
 # Load environment variables
 load_dotenv()
@@ -38,19 +40,36 @@ class ProductInfo:
     screenshot_path: Optional[str] = None
     site: str = "noon.com"
 
+# Column headers of the noon_products_*.xlsx report, and the result field under each
+REPORT_COLUMNS = [
+    ('Name', 'product'),
+    ('Price', 'price'),
+    ('Rating', 'seller_rating'),
+    ('Availability', 'availability'),
+    ('Screenshot', 'screenshot_path'),
+    ('Site', 'site'),
+]
+
+_screenshot_pipeline: Optional[ScreenshotPipeline] = None
+_screenshot_writer = ScreenshotWriter()
+
 def save_screenshot(step_log: ActionStep, agent: CodeAgent) -> None:
     """Callback to save screenshots during agent execution"""
-    sleep(1.0)  # Let animations complete
+    global _screenshot_pipeline
     driver = helium.get_driver()
     if driver:
-        png_bytes = driver.get_screenshot_as_png()
-        image = Image.open(io.BytesIO(png_bytes))
-        step_log.observations_images = [image.copy()]
+        if _screenshot_pipeline is None or _screenshot_pipeline.driver is not driver:
+            _screenshot_pipeline = ScreenshotPipeline(driver)
+        image = _screenshot_pipeline.capture(skip_duplicates=True)
+        if image is None:
+            step_log.observations = "Page unchanged since the previous screenshot"
+            return
+        step_log.observations_images = [image]
         
-        # Save screenshot to file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Encode and write the file in the background
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
         filename = f"product_screenshot_{timestamp}.png"
-        image.save(filename)
+        _screenshot_writer.submit(image, filename)
         
         # Update step log with file path
         step_log.observations = f"Screenshot saved: {filename}"
@@ -106,7 +125,7 @@ def close_popups() -> str:
         return "No popups found"
 
 @tool
-def extract_product_info(container_selector: str = "div[class*='grid'] > span[class*='wrapper productContainer']") -> List[ProductInfo]:
+def extract_product_info(container_selector: str = NOON_TILE_CONTAINER) -> List[ProductInfo]:
     """Extract product information from containers on the current page.
     
     Args:
@@ -115,74 +134,44 @@ def extract_product_info(container_selector: str = "div[class*='grid'] > span[cl
     Returns:
         List[ProductInfo]: List of extracted product information
     """
-    driver = helium.get_driver()
-    results = []
-    
-    containers = driver.find_elements(By.CSS_SELECTOR, container_selector)
-    print(f"Found {len(containers)} product containers")
+    # Every tile is read in one script call instead of several find_element calls per tile
+    tiles = extract_tiles(helium.get_driver(), container_selector)
+    print(f"Found {len(tiles)} product containers")
+    return _products_from_tiles(tiles)
+
+@tool
+def crawl_results(max_results: int = 100, query: str = None) -> List[ProductInfo]:
+    """Load and extract every product of the search results, scrolling and following result pages only as far as needed.
     
-    for container in containers:
-        try:
-            product = ProductInfo(
-                name='',
-                price=0.0,
-                availability='',
-                site='noon.com'
-            )
-            
-            # Extract name
-            name_elem = container.find_element(By.CSS_SELECTOR, "div[data-qa='product-name']")
-            if name_elem:
-                product.name = name_elem.get_attribute('title')
-            
-            # Extract price with fallbacks
-            price_selectors = [
-                "strong.amount",
-                "div[class*='fUFHwr'] strong",
-                "span.currency + strong",
-                "[class*='amount']"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elem = container.find_element(By.CSS_SELECTOR, selector)
-                    if price_elem and price_elem.text:
-                        price_text = ''.join(filter(str.isdigit, price_elem.text))
-                        product.price = float(price_text)
-                        break
-                except:
-                    continue
-            
-            # Extract rating and availability
-            try:
-                rating_elem = container.find_element(By.CSS_SELECTOR, "div[class*='ioGuPV'], div[class*='sc-2709a77c-2']")
-                if rating_elem:
-                    product.rating = float(rating_elem.text.split('/')[0])
-            except:
-                pass
-            
-            try:
-                avail_elem = container.find_element(By.CSS_SELECTOR, "span[class*='gkJOgT'], span[class*='sc-cd83bba5-5']")
-                if avail_elem:
-                    product.availability = avail_elem.text.strip()
-            except:
-                pass
-            
-            if product.name or product.price:
-                results.append(product)
-                
-        except Exception as e:
-            print(f"Error extracting product data: {str(e)}")
-            continue
-            
-    return results
+    Args:
+        max_results: Stop once this many products have been collected (default: 100)
+        query: The search term; crawling stops once results no longer match it
+        
+    Returns:
+        List[ProductInfo]: List of extracted product information
+    """
+    crawler = ResultsCrawler(helium.get_driver(), max_results=max_results, query=query)
+    return _products_from_tiles(crawler.crawl())
+
+def _products_from_tiles(tiles: TileColumns) -> List[ProductInfo]:
+    return [
+        ProductInfo(
+            name=name,
+            price=price,
+            availability=availability,
+            rating=rating,
+            site='noon.com'
+        )
+        for name, price, rating, availability in tiles.rows()
+        if name or price
+    ]
 
 def track_product(product_name: str, site: str = "noon.com") -> List[ProductInfo]:
     """Track product prices and information using CodeAgent"""
     
     # Initialize the agent
     agent = CodeAgent(
-        tools=[search_product, scroll_page, close_popups, extract_product_info],
+        tools=[search_product, scroll_page, close_popups, extract_product_info, crawl_results],
         model=model,  # You'll need to configure this based on your setup
         step_callbacks=[save_screenshot],
         max_steps=15,
@@ -194,8 +183,8 @@ def track_product(product_name: str, site: str = "noon.com") -> List[ProductInfo
     Follow these steps to track product information on {site}:
     1. Navigate to the site and handle any popups
     2. Search for the product: {product_name}
-    3. Scroll through results to ensure all products load
-    4. Extract product information from all visible containers
+    3. Call crawl_results with the product name as query; it scrolls and pages through the results itself
+    4. Use extract_product_info only if crawl_results found nothing
     5. Save screenshots for verification
     
     Return the collected product information.
@@ -219,19 +208,10 @@ def track_product(product_name: str, site: str = "noon.com") -> List[ProductInfo
         
         # Save results
         if results:
-            df = pd.DataFrame([
-                {
-                    'Name': r.name,
-                    'Price': r.price,
-                    'Rating': r.rating,
-                    'Availability': r.availability,
-                    'Screenshot': r.screenshot_path,
-                    'Site': r.site
-                } for r in results
-            ])
-            
             filename = f"noon_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            df.to_excel(filename, index=False)
+            with XlsxSink(filename, columns=REPORT_COLUMNS) as sink:
+                for r in results:
+                    sink.write(result_row(r.name, r))
             print(f"\nResults saved to {filename}")
             
         return results
@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+from .price_tracker_agent import ProductInfo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prices (
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    ts REAL NOT NULL,
+    run_id INTEGER,
+    price REAL,
+    availability TEXT,
+    seller_rating REAL
+);
+CREATE INDEX IF NOT EXISTS idx_prices_product_site_ts ON prices (product, site, ts);
+CREATE INDEX IF NOT EXISTS idx_prices_run ON prices (run_id);
+CREATE TABLE IF NOT EXISTS pages (
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fingerprint TEXT,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (product, site)
+);
+"""
+
+@dataclass
+class PricePoint:
+    product: str
+    site: str
+    ts: float
+    price: Optional[float]
+    availability: Optional[str]
+    seller_rating: Optional[float]
+
+@dataclass
+class PriceDrop:
+    product: str
+    site: str
+    previous_price: float
+    price: float
+
+    @property
+    def change(self) -> float:
+        return self.price - self.previous_price
+
+@dataclass
+class PageState:
+    """Where a product was last found on a site, and what its price region looked like"""
+    product: str
+    site: str
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fingerprint: Optional[str]
+    checked_at: float
+
+class PriceHistory:
+    """Embedded SQLite store of every tracked price, indexed on (product, site, ts)"""
+
+    def __init__(self, path: str = 'price_history.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.run_id: Optional[int] = None
+
+    def start_run(self) -> int:
+        """Start a new tracking run; later appends are tagged with its id"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def append(self, product: str, results: Iterable[ProductInfo], ts: Optional[float] = None) -> int:
+        """Append the results for one product in a single transaction"""
+        return self.append_many(((product, result) for result in results), ts=ts)
+
+    def append_many(self, rows: Iterable[Tuple[str, ProductInfo]], ts: Optional[float] = None) -> int:
+        """Append (product, result) pairs in bulk, in a single transaction"""
+        ts = time.time() if ts is None else ts
+        records = [
+            (product, result.site, ts, self.run_id, result.price, result.availability, result.seller_rating)
+            for product, result in rows
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO prices (product, site, ts, run_id, price, availability, seller_rating) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+        return len(records)
+
+    def latest(self, product: str, site: str) -> Optional[PricePoint]:
+        """Get the most recent observation of a product on a site"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT product, site, ts, price, availability, seller_rating FROM prices "
+                "WHERE product = ? AND site = ? ORDER BY ts DESC LIMIT 1",
+                (product, site)
+            ).fetchone()
+        return PricePoint(*row) if row else None
+
+    def history(self, product: str, site: str, since: Optional[float] = None,
+                until: Optional[float] = None) -> List[PricePoint]:
+        """Get every observation of a product on a site inside a time window"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT product, site, ts, price, availability, seller_rating FROM prices "
+                "WHERE product = ? AND site = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (product, site, since or 0.0, until or float('inf'))
+            ).fetchall()
+        return [PricePoint(*row) for row in rows]
+
+    def recent(self, product: str, site: str, limit: int) -> List[PricePoint]:
+        """Get the last limit observations of a product on a site, oldest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT product, site, ts, price, availability, seller_rating FROM prices "
+                "WHERE product = ? AND site = ? ORDER BY ts DESC LIMIT ?",
+                (product, site, limit)
+            ).fetchall()
+        return [PricePoint(*row) for row in reversed(rows)]
+
+    def price_range(self, product: str, site: str, since: Optional[float] = None,
+                    until: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Get the (min, max) price of a product on a site inside a time window"""
+        # Zero prices mark failed scrapes, not free products
+        with self._lock:
+            return self.conn.execute(
+                "SELECT MIN(price), MAX(price) FROM prices "
+                "WHERE product = ? AND site = ? AND ts >= ? AND ts <= ? AND price > 0",
+                (product, site, since or 0.0, until or float('inf'))
+            ).fetchone()
+
+    def page(self, product: str, site: str) -> Optional[PageState]:
+        """Get the remembered product page for a product on a site"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT product, site, url, etag, last_modified, fingerprint, checked_at FROM pages "
+                "WHERE product = ? AND site = ?",
+                (product, site)
+            ).fetchone()
+        return PageState(*row) if row else None
+
+    def save_page(self, product: str, site: str, url: str, fingerprint: Optional[str] = None,
+                  etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Remember a product's page so the next incremental run can go straight to it"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (product, site, url, etag, last_modified, fingerprint, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (product, site, url, etag, last_modified, fingerprint, time.time())
+            )
+
+    def forget_page(self, product: str, site: str) -> None:
+        """Drop the remembered product page for a product on a site"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM pages WHERE product = ? AND site = ?", (product, site))
+
+    def price_drops(self, run_id: Optional[int] = None) -> List[PriceDrop]:
+        """Find products whose price in a run is lower than in their previous observation
+
+        Defaults to the most recent run.
+        """
+        with self._lock:
+            if run_id is None:
+                row = self.conn.execute("SELECT MAX(id) FROM runs").fetchone()
+                run_id = row[0] if row else None
+                if run_id is None:
+                    return []
+
+            rows = self.conn.execute(
+                """
+                SELECT cur.product, cur.site,
+                       (SELECT prev.price FROM prices prev
+                        WHERE prev.product = cur.product AND prev.site = cur.site
+                          AND prev.ts < cur.ts AND prev.price > 0
+                        ORDER BY prev.ts DESC LIMIT 1) AS previous_price,
+                       cur.price
+                FROM prices cur
+                WHERE cur.run_id = ? AND cur.price > 0
+                """,
+                (run_id,)
+            ).fetchall()
+        return [PriceDrop(*row) for row in rows if row[2] is not None and row[3] < row[2]]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
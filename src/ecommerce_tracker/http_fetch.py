@@ -0,0 +1,77 @@
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .browser_manager import USER_AGENTS
+from .tracing import span
+
+# Status codes and page markers that mean a bot wall, not a real page. Only
+# markers of challenge pages themselves: real pages often load a captcha
+# script in <head> for their login or review forms
+BLOCKED_STATUSES = {401, 403, 429, 503}
+BLOCKED_MARKERS = [
+    'cf-chl',
+    'px-captcha',
+    'geo.captcha-delivery.com',
+    'validatecaptcha',
+    'are you a robot',
+    'verify you are a human',
+    'access denied',
+]
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def blocked(self) -> bool:
+        """Whether the site refused to serve the page to a plain HTTP client"""
+        if self.status in BLOCKED_STATUSES:
+            return True
+        # Bot walls are small pages; only look at the start of the document
+        head = self.text[:5000].lower()
+        return any(marker in head for marker in BLOCKED_MARKERS)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300 and not self.blocked
+
+class HttpFetcher:
+    """Plain HTTP client with keep-alive connection pooling"""
+
+    def __init__(self, pool_size: int = 10, timeout: float = 10, retries: int = 1):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': random.choice(USER_AGENTS),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[FetchResult]:
+        """GET a page, returning None if the request failed outright"""
+        try:
+            with span('http.fetch', url=url) as attrs:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                attrs['status'] = response.status_code
+        except requests.RequestException as e:
+            print(f"HTTP fetch of {url} failed: {str(e)}")
+            return None
+        return FetchResult(
+            url=response.url,
+            status=response.status_code,
+            text=response.text,
+            # Kept case-insensitive, so headers.get('ETag') works whatever the server sent
+            headers=response.headers
+        )
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
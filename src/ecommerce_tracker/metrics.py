@@ -0,0 +1,260 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .tracing import Span
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for every labelled value"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """Set the total directly, for counts kept elsewhere"""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """A set of metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        # Called before every render, for values that are read rather than pushed
+        self.collectors: List[Callable[[], None]] = []
+
+    def _add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._add(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._add(Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+def _process_tree_rss(pid: int) -> Optional[int]:
+    """Resident memory in bytes of a process and all its descendants"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil:
+        try:
+            root = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [root] + root.children(recursive=True))
+        except psutil.Error:
+            return None
+
+    # Without psutil, walk /proc (Linux only)
+    if not os.path.isdir('/proc'):
+        return None
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+            with open(f'/proc/{entry}/statm') as f:
+                resident = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+        rss[int(entry)] = resident * page_size
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+def _driver_pid(driver) -> Optional[int]:
+    # undetected-chromedriver exposes Chrome's pid; plain Selenium only the chromedriver service
+    pid = getattr(driver, 'browser_pid', None)
+    if pid:
+        return pid
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+class TrackerMetrics:
+    """The tracker's counters and histograms, fed from tracing spans"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.products = r.counter('tracker_products_total', 'Products tracked across all sites')
+        self.products_per_minute = r.gauge('tracker_products_per_minute', 'Products tracked per minute in the last cycle')
+        self.site_results = r.counter('tracker_site_results_total', 'Site checks by site and outcome')
+        self.scrape_seconds = r.histogram('tracker_scrape_seconds', 'Time to track a product on one site')
+        self.llm_seconds = r.histogram('tracker_llm_seconds', 'Latency of model calls')
+        self.llm_tokens = r.counter('tracker_llm_tokens_total', 'Model tokens by direction')
+        self.browser_restarts = r.counter('tracker_browser_restarts_total', 'Browsers restarted after they stopped responding')
+        self.chrome_memory = r.gauge('tracker_chrome_memory_bytes', 'Resident memory of each pooled Chrome process tree')
+
+    def observe_span(self, span: Span) -> None:
+        """Tracer listener: turn finished spans into metrics"""
+        if span.name == 'site':
+            outcome = 'success' if span.attrs.get('success') else 'failure'
+            self.site_results.inc(site=span.attrs.get('site'), outcome=outcome)
+            self.scrape_seconds.observe(span.duration, site=span.attrs.get('site'))
+        elif span.name == 'llm':
+            self.llm_seconds.observe(span.duration)
+            for direction in ('input', 'output'):
+                tokens = span.attrs.get(f'{direction}_tokens')
+                if tokens:
+                    self.llm_tokens.inc(tokens, direction=direction)
+
+    def record_cycle(self, products: int, seconds: float) -> None:
+        """Count the products tracked in one daemon cycle"""
+        self.products.inc(products)
+        if seconds > 0:
+            self.products_per_minute.set(products * 60 / seconds)
+
+    def watch_pool(self, pool) -> None:
+        """Read restarts and Chrome memory from a browser pool on every scrape"""
+        def collect() -> None:
+            self.browser_restarts.set(pool.restarts)
+            for index, browser in enumerate(list(pool.browsers)):
+                pid = _driver_pid(browser.driver) if browser.driver else None
+                memory = _process_tree_rss(pid) if pid else None
+                self.chrome_memory.set(memory or 0, browser=index)
+        self.registry.collectors.append(collect)
+
+class MetricsServer:
+    """Serves a registry on http://host:port/metrics from a background thread"""
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9108, host: str = '127.0.0.1'):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would drown out the tracker's own output
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
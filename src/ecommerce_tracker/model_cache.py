@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from PIL import Image
+from smolagents.models import ChatMessage
+from .browser_manager import CACHE_DIR
+
+MODEL_CACHE_PATH = os.path.join(CACHE_DIR, 'model_cache.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    content TEXT,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+"""
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _field(message, name: str):
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+def _feed_content(digest, content: Any) -> None:
+    """Hash message content: text with whitespace collapsed, images by their pixels"""
+    if content is None:
+        return
+    if isinstance(content, str):
+        digest.update(_WHITESPACE_RE.sub(' ', content).strip().encode('utf-8'))
+    elif isinstance(content, Image.Image):
+        # Exact pixels rather than a perceptual hash: a changed price is only
+        # a few pixels and must never hit a stale entry
+        digest.update(f"{content.mode}{content.size}".encode('utf-8'))
+        digest.update(content.tobytes())
+    elif isinstance(content, dict):
+        for key in sorted(content):
+            digest.update(str(key).encode('utf-8'))
+            _feed_content(digest, content[key])
+    elif isinstance(content, (list, tuple)):
+        for part in content:
+            _feed_content(digest, part)
+    else:
+        digest.update(str(content).encode('utf-8'))
+
+def cache_key(messages: List, model_id: Optional[str] = None, **options) -> str:
+    """Fingerprint a model request from its prompt, page text and screenshots"""
+    digest = hashlib.sha256()
+    digest.update(str(model_id).encode('utf-8'))
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    for message in messages:
+        digest.update(b'\x00')
+        digest.update(str(_field(message, 'role')).encode('utf-8'))
+        _feed_content(digest, _field(message, 'content'))
+    return digest.hexdigest()
+
+class CachedModel:
+    """Wraps a smolagents model with a disk-backed response cache.
+
+    Responses are keyed by a fingerprint of the whole request, so re-tracking
+    a page that has not changed replays the earlier answer instead of calling
+    the model. Entries expire after ttl seconds, and the least recently used
+    ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, model, path: str = MODEL_CACHE_PATH, max_entries: int = 10000, ttl: Optional[float] = 7 * 24 * 3600):
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Other processes sharing the cache hold the write lock briefly; wait for it rather than fail
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.last_input_token_count = None
+        self.last_output_token_count = None
+
+    def __getattr__(self, name):
+        # Anything not handled here (model_id, flatten_messages_as_text, ...)
+        # comes from the wrapped model
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counts for this process, plus the number of cached responses"""
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'entries': entries}
+
+    def _get(self, key: str) -> Optional[ChatMessage]:
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT role, content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            role, content, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return ChatMessage(role=role, content=content)
+
+    def _put(self, key: str, response) -> None:
+        now = time.time()
+        role = str(_field(response, 'role') or 'assistant')
+        content = _field(response, 'content')
+        if content is not None and not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, role, content, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, role, content, now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def _cached(self, call, messages, stop_sequences=None, **kwargs):
+        key = cache_key(
+            messages,
+            model_id=getattr(self.model, 'model_id', None),
+            stop_sequences=stop_sequences,
+            tools=[getattr(tool, 'name', str(tool)) for tool in kwargs.get('tools_to_call_from') or []],
+            **{name: value for name, value in kwargs.items() if name != 'tools_to_call_from'}
+        )
+        response = self._get(key)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            self.last_input_token_count = 0
+            self.last_output_token_count = 0
+            return response
+
+        with self._lock:
+            self.misses += 1
+        response = call(messages, stop_sequences=stop_sequences, **kwargs)
+        self.last_input_token_count = getattr(self.model, 'last_input_token_count', None)
+        self.last_output_token_count = getattr(self.model, 'last_output_token_count', None)
+        # Tool-call responses carry structure the cache does not keep
+        if not _field(response, 'tool_calls'):
+            self._put(key, response)
+        return response
+
+    def __call__(self, messages, stop_sequences=None, **kwargs):
+        return self._cached(self.model, messages, stop_sequences=stop_sequences, **kwargs)
+
+    def generate(self, messages, stop_sequences=None, **kwargs):
+        return self._cached(self.model.generate, messages, stop_sequences=stop_sequences, **kwargs)
+
+    def close(self) -> None:
+        """Close the cache database"""
+        with self._lock:
+            self.conn.close()
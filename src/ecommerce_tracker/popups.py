@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from .tracing import span
+
+MODAL_SELECTORS = [
+    "[role='dialog']",
+    "button[class*='close']",
+    "[class*='modal']",
+    "[class*='modal'] button",
+    "[class*='CloseButton']",
+    "[aria-label*='close']",
+    ".modal-close",
+    ".modal-overlay",
+    "[class*='overlay']"
+]
+
+# Clicks every visible element matching any selector and reports which
+# selectors fired, then sends Escape for popups that only close on a key.
+_SWEEP_SCRIPT = """
+var selectors = arguments[0];
+var fired = [];
+function visible(el) {
+    if (!el.isConnected) return false;
+    var rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) return false;
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+}
+for (var i = 0; i < selectors.length; i++) {
+    var elements;
+    try { elements = document.querySelectorAll(selectors[i]); } catch (e) { continue; }
+    var clicked = false;
+    for (var j = 0; j < elements.length; j++) {
+        if (visible(elements[j])) {
+            try { elements[j].click(); clicked = true; } catch (e) {}
+        }
+    }
+    if (clicked) fired.push(selectors[i]);
+}
+var target = document.activeElement || document.body;
+if (target) {
+    ['keydown', 'keyup'].forEach(function (type) {
+        target.dispatchEvent(new KeyboardEvent(type, {key: 'Escape', code: 'Escape', keyCode: 27, bubbles: true}));
+    });
+}
+return fired;
+"""
+
+def site_of(url: str) -> str:
+    """Get the site name (e.g. 'noon.com') from a URL"""
+    host = urlparse(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+class PopupProfileStore:
+    """Remembers, per site, which popup selectors have actually fired"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, int]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._profiles = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not load popup profiles: {str(e)}")
+
+    def selectors(self, site: str) -> List[str]:
+        """Selectors known to fire on a site, most frequent first"""
+        with self._lock:
+            hits = self._profiles.get(site, {})
+            return sorted(hits, key=hits.get, reverse=True)
+
+    def record(self, site: str, fired: List[str]) -> None:
+        """Count the selectors that fired on a site and persist the profile"""
+        if not fired:
+            return
+        with self._lock:
+            hits = self._profiles.setdefault(site, {})
+            for selector in fired:
+                hits[selector] = hits.get(selector, 0) + 1
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self._profiles, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save popup profiles: {str(e)}")
+
+class PopupDismisser:
+    """Closes popups and overlays with a single injected script per attempt"""
+
+    def __init__(self, driver, store: Optional[PopupProfileStore] = None,
+                 selectors: List[str] = MODAL_SELECTORS):
+        self.driver = driver
+        self.store = store or PopupProfileStore()
+        self.selectors = selectors
+
+    def _sweep(self, selectors: List[str]) -> List[str]:
+        try:
+            return self.driver.execute_script(_SWEEP_SCRIPT, selectors) or []
+        except Exception as e:
+            print(f"Popup sweep failed: {str(e)}")
+            return []
+
+    def dismiss(self, site: Optional[str] = None) -> List[str]:
+        """Close visible popups, returning the selectors that fired.
+
+        Sites with a learned profile are swept with just their known
+        selectors first; the full list is only tried when none of those fire.
+        """
+        with span('popups'):
+            site = site or site_of(self.driver.current_url)
+            known = self.store.selectors(site)
+            fired = self._sweep(known) if known else []
+            if not fired:
+                fired = self._sweep(self.selectors)
+        self.store.record(site, fired)
+        return fired
@@ -1,12 +1,30 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+import hashlib
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Dict, Sequence, Tuple, Union
+from urllib.parse import urljoin
 from PIL import Image as PILImage
 from smolagents import CodeAgent, tool
 from smolagents.agents import ActionStep
-from helium import *
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 import time
 import random
 from .browser_manager import BrowserManager
+from .browser_pool import BrowserPool
+from .http_fetch import HttpFetcher
+from .prices import parse_price
+from .session import SessionManager
+from .structured_data import parse_product_data
+from .readiness import create_wait_for_page_tool
+from .recipes import RecipeExecutor, SiteRecipe, default_recipe, get_recipe
+from .tracing import TRACER, span
+from .url_cache import ProductUrlCache, matches_query
+
+if TYPE_CHECKING:
+    from .history import PageState, PriceHistory
 
 HELIUM_INSTRUCTIONS = """
 Use the browser that is already initialized. The following tools and functions are available:
@@ -16,14 +34,18 @@ Use the browser that is already initialized. The following tools and functions a
 - helium_press_enter()
 - helium_exists(selector)
 - helium_find_all(selector)
+- wait_for_page(selector=None, timeout=15)
+- extract_fields(selectors)
 
 Try to find and extract product information:
 
-1. Navigate to the search page using helium_goto.
+1. Navigate to the search page using helium_goto, then call wait_for_page.
 2. Find and interact with the search box using helium_write and helium_click.
-3. Extract price, availability, and rating using helium_exists and helium_find_all.
+3. Call wait_for_page with a result selector, then extract price, availability, and rating with a single extract_fields call that maps each field to its fallback selectors.
 4. Return the results.
 
+Never use time.sleep to wait for pages; wait_for_page returns as soon as the page is usable.
+
 Example selectors that might work:
 - Search box: input[data-qa="txt_searchBar"], input[type="search"], input[placeholder*="Search"]
 - Price: div[data-qa="product-price"], .priceNow, span[data-currency="EGP"]
@@ -35,132 +57,488 @@ The code should handle errors gracefully and return default values if data canno
 
 @dataclass
 class ProductInfo:
+    __slots__ = ('site', 'price', 'availability', 'seller_rating', 'screenshot')
     site: str
     price: float
     availability: str
     seller_rating: Optional[float]
     screenshot: Optional[PILImage.Image]
 
-# First create tool-wrapped versions of the Helium functions
-@tool
-def helium_goto(url: str) -> None:
-    """Navigate to a specified URL using Helium.
-    
-    Args:
-        url: The URL to navigate to (e.g. 'https://www.example.com')
-    """
-    go_to(url)
+def result_fingerprint(result: ProductInfo) -> str:
+    """Cheap fingerprint of a price region; changes whenever price, stock or rating does"""
+    text = f"{result.price:.2f}|{(result.availability or '').strip().lower()}|{result.seller_rating or 0.0:.1f}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
 
-@tool
-def helium_write(text: str, into: str = None) -> None:
-    """Write text into a specified element using Helium.
-    
-    Args:
-        text: The text to write
-        into: CSS selector for the target element (e.g. 'input[type="search"]')
-    """
-    if into:
-        write(text, into=S(into))
-    else:
-        write(text)
-
-@tool
-def helium_click(element: str) -> None:
-    """Click on an element using Helium.
-    
-    Args:
-        element: CSS selector for the element to click (e.g. 'button.submit')
+def create_browser_tools(driver: webdriver.Chrome) -> List:
+    """Create Selenium browser tools bound to the given driver
+
+    The tools keep their helium_* names, which the agent's instructions use,
+    but each pooled browser's agent drives its own Selenium driver; nothing
+    goes through Helium's single global driver.
     """
-    click(S(element))
+    @tool
+    def helium_goto(url: str) -> None:
+        """Navigate to a specified URL.
+        
+        Args:
+            url: The URL to navigate to (e.g. 'https://www.example.com')
+        """
+        with span('tool.helium_goto'):
+            driver.get(url)
 
-@tool
-def helium_press_enter() -> None:
-    """Press the Enter key."""
-    press(ENTER)
+    @tool
+    def helium_write(text: str, into: str = None) -> None:
+        """Write text into a specified element, or the focused one.
+        
+        Args:
+            text: The text to write
+            into: CSS selector for the target element (e.g. 'input[type="search"]')
+        """
+        with span('tool.helium_write'):
+            if into:
+                element = driver.find_element(By.CSS_SELECTOR, into)
+                element.click()
+            else:
+                element = driver.switch_to.active_element
+            element.send_keys(text)
 
-@tool
-def helium_exists(selector: str) -> bool:
-    """Check if an element exists on the page.
-    
-    Args:
-        selector: CSS selector to check for existence (e.g. 'div.product-price')
-    
-    Returns:
-        bool: True if the element exists, False otherwise
-    """
-    return S(selector).exists()
+    @tool
+    def helium_click(element: str) -> None:
+        """Click on an element.
+        
+        Args:
+            element: CSS selector for the element to click (e.g. 'button.submit')
+        """
+        with span('tool.helium_click'):
+            driver.execute_script("arguments[0].click();", driver.find_element(By.CSS_SELECTOR, element))
 
-@tool
-def helium_find_all(selector: str) -> List:
-    """Find all elements matching a selector.
-    
-    Args:
-        selector: CSS selector to find elements (e.g. '.product-item')
-    
-    Returns:
-        List: List of matching elements
-    """
-    return find_all(S(selector))
+    @tool
+    def helium_press_enter() -> None:
+        """Press the Enter key."""
+        with span('tool.helium_press_enter'):
+            driver.switch_to.active_element.send_keys(Keys.ENTER)
 
-@tool
-def helium_wait_for(selector: str, timeout: int = 10) -> bool:
-    """Wait for an element to appear on the page.
-    
-    Args:
-        selector: CSS selector to wait for
-        timeout: Maximum time to wait in seconds
-    
-    Returns:
-        bool: True if element was found, False if timeout occurred
-    """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if S(selector).exists():
-            return True
-        time.sleep(0.5)
-    return False
+    @tool
+    def helium_exists(selector: str) -> bool:
+        """Check if an element exists on the page.
+        
+        Args:
+            selector: CSS selector to check for existence (e.g. 'div.product-price')
+        
+        Returns:
+            bool: True if the element exists, False otherwise
+        """
+        with span('tool.helium_exists'):
+            return len(driver.find_elements(By.CSS_SELECTOR, selector)) > 0
 
-class PriceTrackerAgent:
-    def __init__(self, model, max_steps: int = 10):
-        self.browser = BrowserManager(headless=True)
-        self.browser.initialize()
+    @tool
+    def helium_find_all(selector: str) -> List:
+        """Find all elements matching a selector.
+        
+        Args:
+            selector: CSS selector to find elements (e.g. '.product-item')
         
+        Returns:
+            List: List of matching elements
+        """
+        with span('tool.helium_find_all'):
+            return driver.find_elements(By.CSS_SELECTOR, selector)
+
+    @tool
+    def helium_wait_for(selector: str, timeout: int = 10) -> bool:
+        """Wait for an element to appear on the page.
+        
+        Args:
+            selector: CSS selector to wait for
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            bool: True if element was found, False if timeout occurred
+        """
+        with span('tool.helium_wait_for'):
+            start_time = time.time()
+            while time.time() - start_time < timeout:
+                if driver.find_elements(By.CSS_SELECTOR, selector):
+                    return True
+                time.sleep(0.5)
+            return False
+
+    return [
+        helium_goto,
+        helium_write,
+        helium_click,
+        helium_press_enter,
+        helium_exists,
+        helium_find_all,
+        helium_wait_for
+    ]
+
+class PriceTrackerAgent:
+    def __init__(self, model, max_steps: int = 10, workers: int = 1, fast_path: bool = True,
+                 session: Optional[SessionManager] = None, http_first: bool = True,
+                 http_concurrency: int = 8, model_concurrency: Optional[int] = None,
+                 history: Optional['PriceHistory'] = None, url_cache: Optional[ProductUrlCache] = None):
+        self.model = model
+        self.max_steps = max_steps
+        self.fast_path = fast_path
+        self.http_concurrency = http_concurrency
+        self.model_concurrency = model_concurrency or workers
+        # Product pages found by earlier searches are opened directly; with a
+        # history their fingerprints are kept too, for incremental runs
+        self._owns_url_cache = url_cache is None
+        self.url_cache = url_cache or ProductUrlCache()
+        self.history = history
+        # Browsers borrowed from a session stay warm after this agent is cleaned up
+        self._owns_pool = session is None
+        if session:
+            self.pool = session.pool(workers)
+        else:
+            # Browsers start on first use, so runs served over HTTP never launch Chrome
+            self.pool = BrowserPool(size=workers, headless=True)
+            self.pool.grow(workers)
+        self._agents = {}
+        self.fetcher = HttpFetcher(pool_size=max(http_concurrency, 2 * workers)) if http_first else None
+        # Blocking work runs on bounded executors: one thread per pooled
+        # browser for WebDriver calls, and a separate set for HTTP fetches
+        self._browser_executor = ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix='browser')
+        self._http_executor = ThreadPoolExecutor(max_workers=http_concurrency, thread_name_prefix='http')
+
+    @property
+    def browser(self) -> BrowserManager:
+        """The first browser in the pool"""
+        return self.pool.browsers[0]
+
+    def _agent_for(self, browser: BrowserManager) -> CodeAgent:
+        """Get the CodeAgent for a browser, rebuilding it if the browser was restarted"""
+        driver, agent = self._agents.get(id(browser), (None, None))
+        if agent is None or driver is not browser.driver:
+            agent = self._create_agent(browser)
+            self._agents[id(browser)] = (browser.driver, agent)
+        return agent
+
+    def _create_agent(self, browser: BrowserManager) -> CodeAgent:
+        """Create a CodeAgent whose tools and callbacks drive the given browser"""
         def screenshot_callback(step_log: ActionStep, agent: CodeAgent) -> None:
-            try:
-                screenshot = self.browser.capture_screenshot()
-                if screenshot:
-                    if not hasattr(step_log, 'observations_images') or step_log.observations_images is None:
-                        step_log.observations_images = []
-                    step_log.observations_images.append(screenshot)
+            with span('agent.step_callback', step=getattr(step_log, 'step_number', None)):
+                try:
+                    # Identical frames are skipped so the model is not sent the same image twice
+                    screenshot = browser.capture_screenshot(skip_duplicates=True)
+                    if screenshot:
+                        if not hasattr(step_log, 'observations_images') or step_log.observations_images is None:
+                            step_log.observations_images = []
+                        step_log.observations_images.append(screenshot)
                 
-                url_info = f"Current URL: {self.browser.driver.current_url}"
-                if not hasattr(step_log, 'observations') or step_log.observations is None:
-                    step_log.observations = url_info
-                else:
-                    step_log.observations += f"\n{url_info}"
-            except Exception as e:
-                print(f"Screenshot callback error: {str(e)}")
-
-        self.agent = CodeAgent(
+                    url_info = f"Current URL: {browser.driver.current_url}"
+                    if not screenshot:
+                        url_info += "\nPage unchanged since the previous screenshot"
+                    if not hasattr(step_log, 'observations') or step_log.observations is None:
+                        step_log.observations = url_info
+                    else:
+                        step_log.observations += f"\n{url_info}"
+                except Exception as e:
+                    print(f"Screenshot callback error: {str(e)}")
+
+        return CodeAgent(
             tools=[
-                self.browser.close_popups_tool,
-                helium_goto,
-                helium_write,
-                helium_click,
-                helium_press_enter,
-                helium_exists,
-                helium_find_all,
-                helium_wait_for
-            ],
-            model=model,
-            additional_authorized_imports=["helium", "time", "random"],
+                browser.close_popups_tool,
+                browser.extract_fields_tool,
+                create_wait_for_page_tool(browser.readiness)
+            ] + create_browser_tools(browser.driver),
+            model=self.model,
+            additional_authorized_imports=["time", "random"],
             step_callbacks=[screenshot_callback],
-            max_steps=max_steps,
+            max_steps=self.max_steps,
             verbosity_level=1
         )
-        
-    def track_product(self, product_name: str, sites: List[str] = None) -> List[ProductInfo]:
-        results = []
+
+    def track_product(self, product_name: str, sites: List[str] = None,
+                      on_result: Optional[Callable[[ProductInfo], None]] = None) -> List[ProductInfo]:
+        """Track a product on every site, spreading the sites across the browser pool
+
+        on_result, if given, receives each site's result as soon as it is ready.
+        This runs track_many on its own event loop, so code that already runs
+        inside an event loop should await track_many instead.
+        """
+        callback = (lambda product, result: on_result(result)) if on_result else None
+        return asyncio.run(self.track_many([product_name], sites, on_result=callback))[0]
+
+    async def track_many(self, products: Iterable[Union[str, Tuple[str, Sequence[str]]]],
+                         sites: Optional[Sequence[str]] = None,
+                         on_result: Optional[Callable[[str, ProductInfo], None]] = None) -> List[List[ProductInfo]]:
+        """Track several products concurrently.
+
+        Every (product, site) pair runs as its own task. HTTP fetches and
+        model-driven agent runs are capped by semaphores, and WebDriver work
+        runs on one executor thread per pooled browser, so a single process
+        keeps every browser and connection busy.
+
+        Args:
+            products: Product names, or (product, sites) pairs for products
+                checked on their own sites
+            sites: Sites for products that do not list their own
+            on_result: Called with (product, result) in the event loop's
+                thread as soon as each result is ready
+
+        Returns:
+            List[List[ProductInfo]]: Results per product, in input order
+        """
+        default_sites = list(sites) if sites else ['noon.com']
+        jobs = []
+        for product in products:
+            if isinstance(product, str):
+                jobs.append((product, default_sites))
+            else:
+                name, product_sites = product
+                jobs.append((name, list(product_sites) or default_sites))
+
+        http_slots = asyncio.Semaphore(self.http_concurrency)
+        model_slots = asyncio.Semaphore(self.model_concurrency)
+
+        async def run(product_name: str, site: str) -> ProductInfo:
+            start = time.perf_counter()
+            try:
+                result = await self._track_site(product_name, site, http_slots, model_slots)
+            except Exception as track_error:
+                # One site failing must not cancel the rest of the window
+                print(f"Error tracking {product_name} on {site}: {str(track_error)}")
+                result = ProductInfo(
+                    site=site,
+                    price=0.0,
+                    availability=f"Error: {str(track_error)}",
+                    seller_rating=0.0,
+                    screenshot=None
+                )
+            # Concurrent sites overlap on the event loop's thread, so each gets its own timeline
+            TRACER.record('site', start, time.perf_counter() - start, thread=f"{product_name} @ {site}",
+                          site=site, success=bool(result.price))
+            if on_result:
+                on_result(product_name, result)
+            return result
+
+        tasks = [
+            [asyncio.ensure_future(run(product_name, site)) for site in product_sites]
+            for product_name, product_sites in jobs
+        ]
+        try:
+            await asyncio.gather(*(task for row in tasks for task in row))
+        except BaseException:
+            for row in tasks:
+                for task in row:
+                    task.cancel()
+            raise
+        return [[task.result() for task in row] for row in tasks]
+
+    async def _track_site(self, product_name: str, site: str,
+                          http_slots: asyncio.Semaphore, model_slots: asyncio.Semaphore) -> ProductInfo:
+        """Track a product on a single site.
+
+        Known sites are tried over plain HTTP first, then with their browser
+        recipe; the vision agent is the last resort. A product page found by
+        an earlier search is opened directly before any of them.
+        """
+        loop = asyncio.get_running_loop()
+        recipe = get_recipe(site)
+        url, state = self._known_page(product_name, site) if self.fast_path else (None, None)
+        if url and self.fetcher:
+            async with http_slots:
+                result = await loop.run_in_executor(
+                    self._http_executor, self._recheck_page_over_http, product_name, site, url, state
+                )
+            if result:
+                return result
+            # A 404 or mismatch has just forgotten the page
+            url, state = self._known_page(product_name, site)
+        if url and recipe:
+            result = await loop.run_in_executor(
+                self._browser_executor, self._in_browser, self._recheck_page_in_browser,
+                product_name, recipe, url, state
+            )
+            if result:
+                return result
+
+        if recipe and self.fast_path and self.fetcher and recipe.search_url:
+            async with http_slots:
+                result = await loop.run_in_executor(
+                    self._http_executor, self._track_site_over_http, product_name, recipe
+                )
+            if result:
+                return result
+
+        if recipe and self.fast_path:
+            result = await loop.run_in_executor(
+                self._browser_executor, self._in_browser, self._track_site_with_recipe, product_name, recipe
+            )
+            if result:
+                return result
+
+        async with model_slots:
+            return await loop.run_in_executor(
+                self._browser_executor, self._in_browser, self._track_site_with_agent,
+                product_name, default_recipe(site)
+            )
+
+    def _in_browser(self, fn: Callable[..., ProductInfo], *args) -> ProductInfo:
+        """Run fn(browser, *args) on a browser borrowed from the pool, starting it if needed"""
+        with self.pool.acquire() as browser:
+            browser.ensure_initialized()
+            return fn(browser, *args)
+
+    def _track_site_with_recipe(self, browser: BrowserManager, product_name: str,
+                                recipe: SiteRecipe) -> Optional[ProductInfo]:
+        """Scrape a known site with its recipe, returning None if the recipe failed"""
+        try:
+            fields = RecipeExecutor(browser).run(recipe, product_name)
+        except Exception as e:
+            print(f"Recipe failed on {recipe.site}, falling back to the agent: {str(e)}")
+            return None
+        result = self._result_from_fields(recipe.site, fields, browser.capture_screenshot())
+        self._remember_page(product_name, recipe.site, fields.get('url'), result)
+        return result
+
+    def _result_from_fields(self, site: str, fields: Dict[str, Optional[str]], screenshot) -> ProductInfo:
+        return ProductInfo(
+            site=site,
+            price=self.parse_float(fields['price'], default=0.0),
+            availability=fields.get('availability') or "Unknown",
+            seller_rating=self.parse_float((fields.get('rating') or '').split('/')[0], default=0.0),
+            screenshot=screenshot
+        )
+
+    def _known_page(self, product_name: str, site: str) -> Tuple[Optional[str], Optional['PageState']]:
+        """The product page an earlier search led to, and its stored state in incremental mode"""
+        state = self.history.page(product_name, site) if self.history else None
+        if state:
+            return state.url, state
+        return self.url_cache.get(product_name, site), None
+
+    def _remember_page(self, product_name: str, site: str, url: Optional[str], result: ProductInfo,
+                       etag: Optional[str] = None, last_modified: Optional[str] = None,
+                       previous: Optional['PageState'] = None) -> None:
+        """Store where a product was found, so the next run can go straight to it"""
+        if not url:
+            return
+        self.url_cache.put(product_name, site, url)
+        if not self.history:
+            return
+        fingerprint = result_fingerprint(result)
+        if previous:
+            change = "unchanged" if previous.fingerprint == fingerprint else "changed"
+            print(f"{product_name} {change} on {site}")
+        self.history.save_page(product_name, site, url, fingerprint=fingerprint,
+                               etag=etag, last_modified=last_modified)
+
+    def _forget_page(self, product_name: str, site: str) -> None:
+        """Drop a product page that is gone or shows a different product"""
+        self.url_cache.invalidate(product_name, site)
+        if self.history:
+            self.history.forget_page(product_name, site)
+
+    def _unchanged_result(self, product_name: str, site: str) -> Optional[ProductInfo]:
+        """The last stored result for a product whose page has not changed"""
+        latest = self.history.latest(product_name, site)
+        if latest is None or not latest.price:
+            return None
+        print(f"{product_name} unchanged on {site} (not modified)")
+        return ProductInfo(
+            site=site,
+            price=latest.price,
+            availability=latest.availability or "Unknown",
+            seller_rating=latest.seller_rating or 0.0,
+            screenshot=None
+        )
+
+    def _recheck_page_over_http(self, product_name: str, site: str, url: str,
+                                state: Optional['PageState'] = None) -> Optional[ProductInfo]:
+        """Re-read a remembered product page, with a conditional GET when its state is known"""
+        headers = {}
+        if state and state.etag:
+            headers['If-None-Match'] = state.etag
+        if state and state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+        page = self.fetcher.fetch(url, headers=headers)
+        if page is None:
+            return None
+        if page.status == 304:
+            return self._unchanged_result(product_name, site)
+        if page.status in (404, 410):
+            self._forget_page(product_name, site)
+            return None
+        if not page.ok:
+            return None
+
+        with span('parse', source='http'):
+            data = parse_product_data(page.text)
+        if not data:
+            return None
+        if not matches_query(product_name, data.get('name')):
+            print(f"{site} product page no longer shows {product_name}")
+            self._forget_page(product_name, site)
+            return None
+        result = ProductInfo(
+            site=site,
+            price=data['price'],
+            availability=data.get('availability') or "Unknown",
+            seller_rating=data.get('rating') or 0.0,
+            screenshot=None
+        )
+        self._remember_page(product_name, site, url, result, etag=page.headers.get('ETag'),
+                            last_modified=page.headers.get('Last-Modified'), previous=state)
+        return result
+
+    def _recheck_page_in_browser(self, browser: BrowserManager, product_name: str, recipe: SiteRecipe,
+                                 url: str, state: Optional['PageState'] = None) -> Optional[ProductInfo]:
+        """Re-read a remembered product page in the browser, skipping the search"""
+        try:
+            fields = RecipeExecutor(browser).run_direct(recipe, url)
+        except Exception as e:
+            print(f"Product page check failed on {recipe.site}, searching again: {str(e)}")
+            self._forget_page(product_name, recipe.site)
+            return None
+        if not matches_query(product_name, fields.get('title')):
+            print(f"{recipe.site} product page no longer shows {product_name}")
+            self._forget_page(product_name, recipe.site)
+            return None
+        result = self._result_from_fields(recipe.site, fields, None)
+        # Only pages whose price region changed pay for a screenshot
+        if state is None or result_fingerprint(result) != state.fingerprint:
+            result.screenshot = browser.capture_screenshot()
+        self._remember_page(product_name, recipe.site, url, result, previous=state)
+        return result
+
+    def _track_site_over_http(self, product_name: str, recipe: SiteRecipe) -> Optional[ProductInfo]:
+        """Read price data embedded in the search page without starting a browser"""
+        url = recipe.search_page_url(product_name)
+        page = self.fetcher.fetch(url)
+        if page is None or not page.ok:
+            print(f"HTTP fetch blocked or failed on {recipe.site}, escalating to the browser")
+            return None
+
+        with span('parse', source='http'):
+            data = parse_product_data(page.text)
+        if not data:
+            print(f"No structured price data on {recipe.site}, escalating to the browser")
+            return None
+        # The first product on a search page need not be the one searched for
+        if not matches_query(product_name, data.get('name')):
+            print(f"First {recipe.site} result is not {product_name}, escalating to the browser")
+            return None
+
+        print(f"Found price in {data['source']} on {recipe.site}: {data['price']}")
+        result = ProductInfo(
+            site=recipe.site,
+            price=data['price'],
+            availability=data.get('availability') or "Unknown",
+            seller_rating=data.get('rating') or 0.0,
+            screenshot=None
+        )
+        if data.get('url'):
+            self._remember_page(product_name, recipe.site, urljoin(page.url, data['url']), result)
+        return result
+
+    def _track_site_with_agent(self, browser: BrowserManager, product_name: str, recipe: SiteRecipe) -> ProductInfo:
+        """Track a product on a single site by having the vision agent run the recipe"""
+        agent = self._agent_for(browser)
+        site = recipe.site
 
         try:
             scraping_code = f"""
@@ -173,89 +551,35 @@ result = {{
 
 try:
     # Step 1: Navigate to site
-    print("Step 1: Navigating to noon.com...")
-    helium_goto("https://www.noon.com/egypt-en/")
-    time.sleep(5)  # Wait for initial page load
+    print("Step 1: Navigating to {site}...")
+    helium_goto("{recipe.url}")
+    search_ready = wait_for_page("{recipe.search_box_selector}")
     
     # Step 2: Find and interact with search box
     print("Step 2: Looking for search box...")
-    search_selectors = [
-        "input[type='search']",
-        "input[data-qa='txt_searchBar']",
-        "input[placeholder*='Search']"
-    ]
-    
-    search_found = False
-    for selector in search_selectors:
-        if helium_exists(selector):
-            print(f"Found search box with selector: {{selector}}")
-            helium_write("{product_name}", selector)
-            helium_press_enter()
-            search_found = True
-            time.sleep(5)  # Wait for search results
-            break
-        time.sleep(1)
-    
-    if not search_found:
+    if not search_ready:
         print("Failed to find search box")
         return result
     
+    helium_write({product_name!r}, "{recipe.search_box_selector}")
+    helium_press_enter()
+    
     # Step 3: Wait for and extract product information
     print("Step 3: Extracting product information...")
-    time.sleep(3)  # Wait for products to load
-    
-    # Find price
-    price_selectors = [
-        "div[data-qa='product-price']",
-        "div.priceNow",
-        "span[data-currency='EGP']",
-        "div.productPrice"
-    ]
-    
-    for selector in price_selectors:
-        if helium_exists(selector):
-            elements = helium_find_all(selector)
-            if elements:
-                price_text = elements[0].web_element.text
-                result['price'] = price_text.replace('EGP', '').replace('$', '').strip()
-                print(f"Found price: {{result['price']}}")
-                break
-        time.sleep(0.5)
+    wait_for_page("{recipe.results_selector}")
+    fields = extract_fields({recipe.fields!r})
     
-    # Find availability
-    availability_selectors = [
-        "div[data-qa='delivery-message']",
-        "div.fulfillmentText",
-        "div.stockStatus",
-        "div[data-qa='availability']"
-    ]
+    if fields.get('price'):
+        result['price'] = fields['price'].replace('EGP', '').replace('$', '').strip()
+        print(f"Found price: {{result['price']}}")
     
-    for selector in availability_selectors:
-        if helium_exists(selector):
-            elements = helium_find_all(selector)
-            if elements:
-                result['availability'] = elements[0].web_element.text.strip()
-                print(f"Found availability: {{result['availability']}}")
-                break
-        time.sleep(0.5)
+    if fields.get('availability'):
+        result['availability'] = fields['availability']
+        print(f"Found availability: {{result['availability']}}")
     
-    # Find rating
-    rating_selectors = [
-        "div[data-qa='product-rating']",
-        "div.ratingValue",
-        "div.rating",
-        "span.stars"
-    ]
-    
-    for selector in rating_selectors:
-        if helium_exists(selector):
-            elements = helium_find_all(selector)
-            if elements:
-                rating_text = elements[0].web_element.text.strip()
-                result['rating'] = rating_text.split('/')[0].strip()
-                print(f"Found rating: {{result['rating']}}")
-                break
-        time.sleep(0.5)
+    if fields.get('rating'):
+        result['rating'] = fields['rating'].split('/')[0].strip()
+        print(f"Found rating: {{result['rating']}}")
 
 except Exception as e:
     print(f"Error during scraping: {{str(e)}}")
@@ -270,9 +594,16 @@ return result
 """
 
             # Run the code using the agent
-            print("\nStarting web scraping...")
-            response = self.agent.run(scraping_code)
-            print("Web scraping completed")
+            print(f"\nStarting web scraping on {site}...")
+            waited_before = browser.readiness.total_wait()
+            # The browser's last frame belongs to the previous product
+            browser.screenshots.reset()
+            # The vision model reads screenshots, so let images load for this run
+            browser.apply_blocking(site, images=True)
+            with span('agent.run', site=site):
+                response = agent.run(scraping_code)
+            waited = browser.readiness.total_wait() - waited_before
+            print(f"Web scraping completed on {site} ({waited:.2f}s spent waiting for pages)")
 
             # Parse the response
             try:
@@ -293,48 +624,54 @@ return result
                 print(f"Raw output:\n{output_text}")
 
                 # Extract values
-                price = self.extract_field(output_text, "Price", default=0.0, is_float=True)
-                availability = self.extract_field(output_text, "Availability", default="Unknown")
-                rating = self.extract_field(output_text, "Rating", default=0.0, is_float=True)
+                with span('parse', source='agent'):
+                    price = self.extract_field(output_text, "Price", default=0.0, is_float=True)
+                    availability = self.extract_field(output_text, "Availability", default="Unknown")
+                    rating = self.extract_field(output_text, "Rating", default=0.0, is_float=True)
 
                 print(f"\nExtracted values:")
                 print(f"Price: ${price}")
                 print(f"Availability: {availability}")
                 print(f"Rating: {rating}")
 
-                results.append(ProductInfo(
-                    site="noon.com",
+                return ProductInfo(
+                    site=site,
                     price=price,
                     availability=availability,
                     seller_rating=rating,
                     screenshot=screenshot
-                ))
+                )
 
             except Exception as parse_error:
                 print(f"Error parsing response: {str(parse_error)}")
-                results.append(ProductInfo(
-                    site="noon.com",
+                return ProductInfo(
+                    site=site,
                     price=0.0,
                     availability="Error parsing response",
                     seller_rating=0.0,
                     screenshot=None
-                ))
+                )
 
         except Exception as track_error:
             print(f"Error tracking product: {str(track_error)}")
-            results.append(ProductInfo(
-                site="noon.com",
+            return ProductInfo(
+                site=site,
                 price=0.0,
                 availability=f"Error: {str(track_error)}",
                 seller_rating=0.0,
                 screenshot=None
-            ))
-
-        return results
+            )
         
     def cleanup(self):
         """Clean up resources"""
-        self.browser.cleanup()
+        self._browser_executor.shutdown(wait=True)
+        self._http_executor.shutdown(wait=True)
+        if self._owns_pool:
+            self.pool.cleanup()
+        if self._owns_url_cache:
+            self.url_cache.close()
+        if self.fetcher:
+            self.fetcher.close()
 
     @staticmethod
     def extract_field(output: str, field_name: str, default, is_float: bool = False):
@@ -361,14 +698,19 @@ return result
             
             # Clean and convert the value
             if is_float:
-                clean_value = ''.join(c for c in value if c.isdigit() or c in '.-')
-                if not clean_value:
-                    print(f"No numeric value found in {value}")
-                    return default
-                return float(clean_value)
+                return PriceTrackerAgent.parse_float(value, default)
             
             return value.strip('$ ')
         
         except Exception as e:
             print(f"Error extracting {field_name}: {str(e)}")
-            return default
\ No newline at end of file
+            return default
+
+    @staticmethod
+    def parse_float(value: str, default):
+        """Convert scraped text such as 'EGP 1,299.00', '1.299,00 €' or '١٬٢٩٩٫٠٠' into a float."""
+        number = parse_price(value)
+        if number is None:
+            print(f"No numeric value found in {value}")
+            return default
+        return number
@@ -0,0 +1,176 @@
+import re
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# Arabic-Indic and Persian digits, and the Arabic decimal and thousands
+# separators, mapped to their ASCII equivalents before anything else
+_DIGIT_TABLE = str.maketrans({
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    '٫': '.',
+    '٬': ',',
+    '،': ',',
+    # No-break, narrow no-break and thin spaces group digits in fr/ru style prices
+    '\u00a0': ' ',
+    '\u202f': ' ',
+    '\u2009': ' ',
+    '\u2019': "'",
+})
+
+# Symbols and codes, mapped to ISO 4217 codes
+CURRENCIES = {
+    'EGP': 'EGP', 'E£': 'EGP', 'LE': 'EGP', 'L.E.': 'EGP', 'ج.م': 'EGP', 'جنيه': 'EGP',
+    'SAR': 'SAR', 'ر.س': 'SAR', 'ريال': 'SAR',
+    'AED': 'AED', 'د.إ': 'AED', 'درهم': 'AED',
+    'KWD': 'KWD', 'د.ك': 'KWD',
+    'BHD': 'BHD', 'OMR': 'OMR', 'JOD': 'JOD', 'QAR': 'QAR', 'TND': 'TND',
+    'USD': 'USD', 'US$': 'USD', '$': 'USD',
+    'EUR': 'EUR', '€': 'EUR',
+    'GBP': 'GBP', '£': 'GBP',
+    'INR': 'INR', '₹': 'INR', 'Rs.': 'INR',
+    'JPY': 'JPY', '¥': 'JPY',
+    'CHF': 'CHF',
+    'TRY': 'TRY', '₺': 'TRY',
+}
+
+# Currencies whose minor unit has three digits, so '12.500' is twelve and a half
+THREE_DECIMAL_CURRENCIES = {'KWD', 'BHD', 'OMR', 'JOD', 'TND'}
+
+# Decimal separator per locale; the other of '.' and ',' groups thousands
+LOCALE_DECIMALS = {
+    'en': '.', 'ar': '.', 'ja': '.', 'zh': '.', 'hi': '.',
+    'de': ',', 'fr': ',', 'es': ',', 'it': ',', 'nl': ',', 'pt': ',', 'ru': ',', 'tr': ',', 'pl': ',',
+}
+
+def ascii_digits(text: str) -> str:
+    """Text with Arabic-Indic and Persian digits and separators replaced by ASCII ones"""
+    return text.translate(_DIGIT_TABLE)
+
+def _currency_pattern() -> re.Pattern:
+    alternatives = []
+    # Longest first, so 'US$' wins over '$' and 'ج.م' is not cut short
+    for token in sorted(CURRENCIES, key=len, reverse=True):
+        escaped = re.escape(token)
+        if token.isascii() and token[0].isalpha():
+            # Codes must stand alone: 'LE' inside 'SALE' is not a currency
+            escaped = rf'(?<![A-Za-z]){escaped}(?![A-Za-z])'
+        alternatives.append(escaped)
+    return re.compile('|'.join(alternatives))
+
+_CURRENCY_RE = _currency_pattern()
+# A number may group digits with ',', '.', "'" or a space followed by exactly three digits
+_NUMBER_RE = re.compile(r"\d(?:[\d.,']|\s(?=\d{3}(?!\d)))*")
+_RANGE_GAP_RE = re.compile(r'\s*(?:-|–|—|~|to|إلى|الى)\s*$', re.IGNORECASE)
+# Unambiguous plain decimals; '1.299' is left to the full parser
+_PLAIN_RE = re.compile(r'\d+(?:\.(?:\d{1,2}|\d{4,}))?')
+
+@dataclass
+class ParsedPrice:
+    amount: float
+    currency: Optional[str] = None
+    # Set for price ranges such as '1,299 - 1,499'; amount is the low end
+    high: Optional[float] = None
+
+def _decimal_separator(number: str, currency: Optional[str], locale: Optional[str]) -> Optional[str]:
+    """Which of '.' and ',' is the decimal separator in number, if either"""
+    if locale:
+        return LOCALE_DECIMALS.get(locale.split('-')[0].split('_')[0].lower(), '.')
+    last_dot, last_comma = number.rfind('.'), number.rfind(',')
+    if last_dot >= 0 and last_comma >= 0:
+        # Both present: whichever comes last separates the decimals
+        return '.' if last_dot > last_comma else ','
+    separator = '.' if last_dot >= 0 else ',' if last_comma >= 0 else None
+    if separator is None:
+        return None
+    position = number.rfind(separator)
+    if number.count(separator) > 1:
+        return None
+    if len(number) - position - 1 != 3:
+        return separator
+    # Exactly three digits follow: a thousands group, unless the integer part
+    # is zero ('0.999') or it is a dot and the currency has three decimals
+    if number[:position] == '0' or (separator == '.' and currency in THREE_DECIMAL_CURRENCIES):
+        return separator
+    return None
+
+def _to_amount(number: str, currency: Optional[str], locale: Optional[str]) -> Optional[float]:
+    number = re.sub(r"[\s']", '', number).strip('.,')
+    if not number:
+        return None
+    decimal = _decimal_separator(number, currency, locale)
+    group = {'.': ',', ',': '.'}.get(decimal)
+    if group:
+        number = number.replace(group, '')
+    else:
+        number = number.replace('.', '').replace(',', '')
+    if decimal:
+        if number.count(decimal) > 1:
+            return None
+        number = number.replace(decimal, '.')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=65536)
+def parse_price_info(text: str, locale: Optional[str] = None) -> Optional[ParsedPrice]:
+    """Parse a price such as 'EGP 1,299.00', '1.299,00 €', '١٬٢٩٩٫٠٠ ج.م' or '$10 - $20'
+
+    Without a locale, separators are read from the number itself: the last
+    of ',' and '.' is the decimal separator when both appear, and a lone
+    separator followed by exactly three digits groups thousands.
+
+    Returns:
+        ParsedPrice or None: None if the text holds no number
+    """
+    text = text.translate(_DIGIT_TABLE)
+    match = _CURRENCY_RE.search(text)
+    currency = CURRENCIES[match.group(0)] if match else None
+
+    numbers = list(_NUMBER_RE.finditer(text))
+    if not numbers:
+        return None
+    amount = _to_amount(numbers[0].group(0), currency, locale)
+    if amount is None:
+        return None
+    high = None
+    if len(numbers) > 1:
+        # Only a dash, 'to' and currency marks may separate the two ends of a range
+        gap = _CURRENCY_RE.sub('', text[numbers[0].end():numbers[1].start()])
+        if _RANGE_GAP_RE.match(gap):
+            high = _to_amount(numbers[1].group(0), currency, locale)
+    return ParsedPrice(amount=amount, currency=currency, high=high)
+
+def parse_price(text, default: Optional[float] = None, locale: Optional[str] = None) -> Optional[float]:
+    """Parse a price, or the low end of a price range, into a float"""
+    if text is None:
+        return default
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return float(text)
+    text = str(text).strip()
+    # Most prices in structured data are already plain decimals
+    if _PLAIN_RE.fullmatch(text):
+        return float(text)
+    parsed = parse_price_info(text, locale)
+    return parsed.amount if parsed else default
+
+def parse_prices(texts: Iterable[str], default: float = 0.0, locale: Optional[str] = None) -> array:
+    """Parse a column of prices; repeated texts are parsed once"""
+    values = array('d')
+    for text in texts:
+        amount = parse_price(text, locale=locale) if text else None
+        values.append(default if amount is None else amount)
+    return values
+
+_RATING_RE = re.compile(r'\d+(?:[.,]\d+)?')
+
+def parse_number(text, default: Optional[float] = None) -> Optional[float]:
+    """Parse the first plain number in a text, such as the 4.5 of '4.5/5' or '٤٫٥'"""
+    if text is None:
+        return default
+    match = _RATING_RE.search(str(text).translate(_DIGIT_TABLE))
+    if not match:
+        return default
+    return float(match.group(0).replace(',', '.'))
@@ -0,0 +1,127 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional
+from smolagents import tool
+import time
+from .tracing import TRACER
+
+# One probe per poll: document state, whether the selector matches yet, and
+# how many network resources the page has requested so far.
+_PROBE_SCRIPT = """
+var selector = arguments[0];
+var present = true;
+if (selector) {
+    try { present = document.querySelector(selector) !== null; } catch (e) { present = false; }
+}
+var resources = window.performance && performance.getEntriesByType
+    ? performance.getEntriesByType('resource').length : 0;
+return [document.readyState, present, resources];
+"""
+
+_COUNT_SCRIPT = """
+try { return document.querySelectorAll(arguments[0]).length; } catch (e) { return 0; }
+"""
+
+@dataclass
+class WaitRecord:
+    name: str
+    duration: float
+    satisfied: bool
+
+class PageReadiness:
+    """Wait on DOM and network conditions instead of fixed sleeps"""
+
+    def __init__(self, driver, poll_interval: float = 0.1, keep: int = 100):
+        self.driver = driver
+        self.poll_interval = poll_interval
+        # The browser outlives many runs, so only the latest waits are kept;
+        # the totals cover every wait
+        self.records: Deque[WaitRecord] = deque(maxlen=keep)
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+
+    def _probe(self, selector: Optional[str]):
+        try:
+            return self.driver.execute_script(_PROBE_SCRIPT, selector)
+        except Exception:
+            # The page may be mid-navigation; treat it as not ready yet
+            return ['loading', False, 0]
+
+    def _record(self, name: str, start: float, satisfied: bool) -> bool:
+        record = WaitRecord(name=name, duration=time.time() - start, satisfied=satisfied)
+        self.records.append(record)
+        self.wait_count += 1
+        self.wait_seconds += record.duration
+        TRACER.record('wait_for_page', time.perf_counter() - record.duration, record.duration,
+                      target=name, satisfied=satisfied)
+        status = "ready" if satisfied else "timed out"
+        print(f"Waited {record.duration:.2f}s for {name} ({status})")
+        return satisfied
+
+    def wait_until_ready(self, selector: Optional[str] = None, timeout: float = 15,
+                         quiet_time: float = 0.5) -> bool:
+        """Wait until the page is usable.
+
+        With a selector, the page is usable once the DOM is parsed and the
+        selector matches. Without one, the document must be fully loaded and
+        no new network requests may have started for quiet_time seconds.
+        """
+        name = f"'{selector}'" if selector else "page load"
+        start = time.time()
+        last_count = -1
+        quiet_since = start
+
+        while True:
+            state, present, resources = self._probe(selector)
+            now = time.time()
+
+            if resources != last_count:
+                last_count = resources
+                quiet_since = now
+
+            if selector:
+                if state in ('interactive', 'complete') and present:
+                    return self._record(name, start, True)
+            elif state == 'complete' and now - quiet_since >= quiet_time:
+                return self._record(name, start, True)
+
+            if now - start >= timeout:
+                return self._record(name, start, False)
+            time.sleep(self.poll_interval)
+
+    def wait_for_count(self, selector: str, known: int, timeout: float = 5) -> int:
+        """Wait until more than known elements match selector, returning the new count
+
+        Returns the current count, which may still be known, once timeout passes.
+        """
+        start = time.time()
+        while True:
+            try:
+                count = self.driver.execute_script(_COUNT_SCRIPT, selector) or 0
+            except Exception:
+                count = 0
+            if count > known or time.time() - start >= timeout:
+                self._record(f"more than {known} '{selector}'", start, count > known)
+                return count
+            time.sleep(self.poll_interval)
+
+    def total_wait(self) -> float:
+        """Total seconds spent waiting so far"""
+        return self.wait_seconds
+
+def create_wait_for_page_tool(readiness: PageReadiness):
+    """Create a wait_for_page tool backed by the given readiness tracker"""
+    @tool
+    def wait_for_page(selector: str = None, timeout: int = 15) -> bool:
+        """Wait until the current page is ready to use, returning as soon as it is.
+
+        Args:
+            selector: Optional CSS selector that must be present (e.g. 'div.product-price'). Without it, waits for the page to finish loading and the network to go quiet.
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            bool: True if the page became ready, False if timeout occurred
+        """
+        return readiness.wait_until_ready(selector, timeout=timeout)
+
+    return wait_for_page
@@ -0,0 +1,220 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from .browser_manager import BrowserManager
+from .tracing import span
+
+@dataclass
+class SiteRecipe:
+    """Navigation steps and selectors for scraping one site's search results"""
+    site: str
+    url: str
+    search_box: List[str]
+    fields: Dict[str, List[str]]
+    required_fields: List[str] = field(default_factory=lambda: ['price'])
+    search_url: Optional[str] = None
+    # Link from the first search result to its product page
+    product_link: List[str] = field(default_factory=list)
+    # Selectors on the product page itself; defaults to fields
+    product_fields: Optional[Dict[str, List[str]]] = None
+
+    def search_page_url(self, product_name: str) -> Optional[str]:
+        """URL of the search results page, for sites that can be fetched directly"""
+        if not self.search_url:
+            return None
+        return self.search_url.format(query=quote_plus(product_name))
+
+    @property
+    def search_box_selector(self) -> str:
+        """All search box selectors combined into one CSS selector"""
+        return ", ".join(self.search_box)
+
+    @property
+    def results_selector(self) -> str:
+        """Selector whose presence means search results have rendered"""
+        return ", ".join(self.fields[self.required_fields[0]])
+
+    @property
+    def page_fields(self) -> Dict[str, List[str]]:
+        """Field selectors for a product page visited directly"""
+        return self.product_fields or self.fields
+
+NOON_FIELDS = {
+    'price': [
+        "div[data-qa='product-price']",
+        "div.priceNow",
+        "span[data-currency='EGP']",
+        "div.productPrice"
+    ],
+    'availability': [
+        "div[data-qa='delivery-message']",
+        "div.fulfillmentText",
+        "div.stockStatus",
+        "div[data-qa='availability']"
+    ],
+    'rating': [
+        "div[data-qa='product-rating']",
+        "div.ratingValue",
+        "div.rating",
+        "span.stars"
+    ]
+}
+
+NOON_PRODUCT_LINK = [
+    "a[href*='/p/']",
+    "div[data-qa='product-block'] a"
+]
+
+# Every product tile on a search results page, and the fields inside one tile
+NOON_TILE_CONTAINER = "div[class*='grid'] > span[class*='wrapper productContainer']"
+
+NOON_TILE_FIELDS = {
+    'name': ["div[data-qa='product-name']"],
+    'price': [
+        "strong.amount",
+        "div[class*='fUFHwr'] strong",
+        "span.currency + strong",
+        "[class*='amount']"
+    ],
+    'rating': ["div[class*='ioGuPV'], div[class*='sc-2709a77c-2']"],
+    'availability': ["span[class*='gkJOgT'], span[class*='sc-cd83bba5-5']"]
+}
+
+# Link to the next page of search results
+NOON_NEXT_PAGE = [
+    "a[rel='next']",
+    "a[aria-label='Next page']",
+    "li.next a",
+    "div[class*='pagination'] a[class*='next']"
+]
+
+NOON_SEARCH_BOX = [
+    "input[type='search']",
+    "input[data-qa='txt_searchBar']",
+    "input[placeholder*='Search']"
+]
+
+# Sites whose layout is known well enough to scrape without the model
+RECIPES = {
+    'noon.com': SiteRecipe(
+        site='noon.com',
+        url="https://www.noon.com/egypt-en/",
+        search_box=NOON_SEARCH_BOX,
+        fields=NOON_FIELDS,
+        search_url="https://www.noon.com/egypt-en/search/?q={query}",
+        product_link=NOON_PRODUCT_LINK
+    ),
+}
+
+def get_recipe(site: str) -> Optional[SiteRecipe]:
+    """Get the known recipe for a site, if there is one"""
+    return RECIPES.get(site)
+
+def default_recipe(site: str) -> SiteRecipe:
+    """Get the recipe for a site, guessing noon.com-style selectors for unknown sites"""
+    return RECIPES.get(site) or SiteRecipe(
+        site=site,
+        url=f"https://www.{site}/",
+        search_box=NOON_SEARCH_BOX,
+        fields=NOON_FIELDS
+    )
+
+class RecipeError(Exception):
+    """Raised when a recipe step fails and the vision agent has to take over"""
+
+# Absolute URL of the first element matching a selector that has an href
+_LINK_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+return el && el.href ? el.href : null;
+"""
+
+def find_link(driver, selectors: List[str]) -> Optional[str]:
+    """Get the absolute URL of the first link matching any of the selectors"""
+    return driver.execute_script(_LINK_SCRIPT, ", ".join(selectors))
+
+def find_product_url(driver, recipe: SiteRecipe) -> Optional[str]:
+    """Get the URL of the first search result's product page"""
+    if not recipe.product_link:
+        return None
+    try:
+        return find_link(driver, recipe.product_link)
+    except Exception as e:
+        print(f"Could not resolve the product link on {recipe.site}: {str(e)}")
+        return None
+
+class RecipeExecutor:
+    """Run site recipes directly against a browser, without any model calls"""
+
+    def __init__(self, browser: BrowserManager, timeout: float = 15):
+        self.browser = browser
+        self.timeout = timeout
+
+    def _search(self, recipe: SiteRecipe, product_name: str) -> None:
+        with span('search', site=recipe.site):
+            search_box = self.browser.driver.find_element(By.CSS_SELECTOR, recipe.search_box_selector)
+            search_box.click()
+            search_box.send_keys(product_name + Keys.ENTER)
+
+    def run(self, recipe: SiteRecipe, product_name: str) -> Dict[str, Optional[str]]:
+        """Search for a product and extract its fields.
+
+        Raises:
+            RecipeError: If navigation fails or a required field is missing
+        """
+        driver = self.browser.driver
+        readiness = self.browser.readiness
+
+        print(f"Running {recipe.site} recipe for {product_name}...")
+        # Only DOM text is read here, so images can stay blocked
+        self.browser.apply_blocking(recipe.site, images=False)
+        with span('navigate', site=recipe.site):
+            driver.get(recipe.url)
+        if not readiness.wait_until_ready(recipe.search_box_selector, timeout=self.timeout):
+            raise RecipeError(f"Search box not found on {recipe.site}")
+
+        try:
+            self._search(recipe, product_name)
+        except Exception:
+            # Usually an overlay intercepting the click; clear it and retry once
+            if not self.browser.close_popups(recipe.site):
+                raise RecipeError(f"Could not search on {recipe.site}")
+            try:
+                self._search(recipe, product_name)
+            except Exception as e:
+                raise RecipeError(f"Could not search on {recipe.site}: {str(e)}")
+
+        if not readiness.wait_until_ready(recipe.results_selector, timeout=self.timeout):
+            raise RecipeError(f"No results appeared on {recipe.site}")
+
+        fields = self.browser.extract_fields(recipe.fields)
+        self._check_required(recipe, fields)
+        fields['url'] = find_product_url(driver, recipe)
+        return fields
+
+    def run_direct(self, recipe: SiteRecipe, url: str) -> Dict[str, Optional[str]]:
+        """Extract a product's fields straight from its page, skipping the search
+
+        Raises:
+            RecipeError: If the page does not render or a required field is missing
+        """
+        page_fields = recipe.page_fields
+        print(f"Checking {recipe.site} product page {url}...")
+        self.browser.apply_blocking(recipe.site, images=False)
+        with span('navigate', site=recipe.site):
+            self.browser.driver.get(url)
+        price_selector = ", ".join(page_fields[recipe.required_fields[0]])
+        if not self.browser.readiness.wait_until_ready(price_selector, timeout=self.timeout):
+            raise RecipeError(f"Product page did not render on {recipe.site}")
+
+        fields = self.browser.extract_fields(page_fields)
+        self._check_required(recipe, fields)
+        fields['title'] = self.browser.driver.title
+        return fields
+
+    @staticmethod
+    def _check_required(recipe: SiteRecipe, fields: Dict[str, Optional[str]]) -> None:
+        missing = [name for name in recipe.required_fields if not fields.get(name)]
+        if missing:
+            raise RecipeError(f"Missing {', '.join(missing)} on {recipe.site}")
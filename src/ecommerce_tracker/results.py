@@ -0,0 +1,138 @@
+import math
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+class ResultRow(NamedTuple):
+    product: str
+    site: str
+    price: float
+    availability: str
+    seller_rating: Optional[float]
+    screenshot_path: Optional[str]
+
+def result_row(product: str, result, screenshot_path: Optional[str] = None) -> ResultRow:
+    """Convert a ProductInfo-like result into a ResultRow, dropping any in-memory screenshot"""
+    rating = getattr(result, 'seller_rating', getattr(result, 'rating', None))
+    return ResultRow(
+        product=product,
+        site=result.site,
+        price=float(result.price or 0.0),
+        availability=result.availability or '',
+        seller_rating=rating,
+        screenshot_path=screenshot_path or getattr(result, 'screenshot_path', None)
+    )
+
+def is_failed(result) -> bool:
+    """Whether a result, or a written record of one, is a failed check rather than a price"""
+    if isinstance(result, dict):
+        price, availability = result.get('price'), result.get('availability')
+    else:
+        price, availability = result.price, result.availability
+    return not price and str(availability or '').startswith('Error')
+
+class _StringColumn:
+    """Stores repeated strings once and keeps a compact array of indices"""
+    __slots__ = ('values', 'index', 'codes')
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.codes = array('I')
+
+    def append(self, value: str) -> None:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+class ResultSet:
+    """Columnar container for tracking results.
+
+    Prices and ratings live in typed arrays and repeated strings (products,
+    sites, availability messages) are stored once. Screenshots are written to
+    screenshot_dir as soon as a result is added (through screenshot_writer,
+    if given, so encoding happens off the calling thread) and only their
+    paths are kept, so memory stays flat however many products are tracked.
+    """
+    __slots__ = ('screenshot_dir', 'screenshot_prefix', 'screenshot_writer', '_products',
+                 '_sites', '_availability', '_prices', '_ratings', '_screenshots')
+
+    def __init__(self, screenshot_dir: Optional[str] = None, screenshot_prefix: str = 'screenshot',
+                 screenshot_writer=None):
+        self.screenshot_dir = screenshot_dir
+        self.screenshot_prefix = screenshot_prefix
+        self.screenshot_writer = screenshot_writer
+        self._products = _StringColumn()
+        self._sites = _StringColumn()
+        self._availability = _StringColumn()
+        self._prices = array('d')
+        self._ratings = array('d')
+        self._screenshots: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def append(self, product: str, result) -> ResultRow:
+        """Add a ProductInfo-like result, spilling its screenshot to disk"""
+        rating = getattr(result, 'seller_rating', getattr(result, 'rating', None))
+        screenshot_path = getattr(result, 'screenshot_path', None)
+        screenshot = getattr(result, 'screenshot', None)
+        if screenshot is not None and screenshot_path is None and self.screenshot_dir:
+            screenshot_path = self._save_screenshot(screenshot, result.site)
+
+        self._products.append(product)
+        self._sites.append(result.site)
+        self._availability.append(result.availability or '')
+        self._prices.append(float(result.price or 0.0))
+        self._ratings.append(math.nan if rating is None else float(rating))
+        self._screenshots.append(screenshot_path)
+        return self[len(self) - 1]
+
+    def extend(self, product: str, results: Iterable) -> None:
+        """Add every result tracked for a product"""
+        for result in results:
+            self.append(product, result)
+
+    def _save_screenshot(self, screenshot, site: str) -> str:
+        os.makedirs(self.screenshot_dir, exist_ok=True)
+        path = os.path.join(
+            self.screenshot_dir,
+            f"{self.screenshot_prefix}_{len(self)}_{site.replace('.', '_')}.png"
+        )
+        if self.screenshot_writer:
+            self.screenshot_writer.submit(screenshot, path)
+        else:
+            screenshot.save(path)
+        return path
+
+    def __getitem__(self, i: int) -> ResultRow:
+        if i < 0:
+            i += len(self)
+        rating = self._ratings[i]
+        return ResultRow(
+            product=self._products[i],
+            site=self._sites[i],
+            price=self._prices[i],
+            availability=self._availability[i],
+            seller_rating=None if math.isnan(rating) else rating,
+            screenshot_path=self._screenshots[i]
+        )
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def prices(self) -> array:
+        """Price column as a typed array"""
+        return self._prices
+
+    @property
+    def ratings(self) -> array:
+        """Rating column as a typed array, with NaN for missing ratings"""
+        return self._ratings
@@ -0,0 +1,182 @@
+import heapq
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .history import PriceHistory
+
+class TokenBucket:
+    """Allows rate requests per minute on average, with bursts of up to burst"""
+
+    def __init__(self, rate: float, burst: float = 1):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate / 60.0
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+@dataclass(order=True)
+class ScheduledItem:
+    next_due: float
+    product: str = field(compare=False)
+    site: str = field(compare=False)
+    interval: float = field(compare=False)
+
+def volatility(prices: List[float]) -> float:
+    """Share of consecutive observations in which the price moved"""
+    prices = [price for price in prices if price and price > 0]
+    if len(prices) < 2:
+        return 0.0
+    changes = sum(1 for previous, current in zip(prices, prices[1:]) if abs(current - previous) > 0.005)
+    return changes / (len(prices) - 1)
+
+class Scheduler:
+    """Priority queue of (product, site) checks, ordered by when they are next due.
+
+    Every site has a token bucket, so due checks are handed out no faster
+    than the site's rate limit. After each check the product's interval is
+    recomputed from how often its recent prices moved: always-moving prices
+    are checked every min_interval, never-moving ones every max_interval.
+    """
+
+    def __init__(self, history: Optional['PriceHistory'] = None, min_interval: float = 900,
+                 max_interval: float = 86400, default_interval: float = 3600,
+                 default_rate: float = 6, site_rates: Optional[Dict[str, float]] = None,
+                 burst: float = 2, window: int = 10):
+        if min_interval <= 0:
+            raise ValueError("Scheduler min_interval must be positive")
+        if max_interval < min_interval:
+            raise ValueError("Scheduler max_interval must not be below min_interval")
+        self.history = history
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.default_rate = default_rate
+        self.site_rates = site_rates or {}
+        self.burst = burst
+        self.window = window
+        self._queue: List[ScheduledItem] = []
+        self._items: Dict[Tuple[str, str], ScheduledItem] = {}
+        # Checks handed out by due() and not yet completed
+        self._running: Set[Tuple[str, str]] = set()
+        self._prices: Dict[Tuple[str, str], Deque[float]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def bucket(self, site: str) -> TokenBucket:
+        """The rate limiter for a site"""
+        if site not in self._buckets:
+            self._buckets[site] = TokenBucket(self.site_rates.get(site, self.default_rate), self.burst)
+        return self._buckets[site]
+
+    def _recent_prices(self, product: str, site: str) -> Deque[float]:
+        key = (product, site)
+        if key not in self._prices:
+            prices = deque(maxlen=self.window)
+            if self.history:
+                prices.extend(point.price for point in self.history.recent(product, site, self.window))
+            self._prices[key] = prices
+        return self._prices[key]
+
+    def interval_for(self, product: str, site: str) -> float:
+        """Check interval for a product, from the volatility of its recent prices"""
+        prices = list(self._recent_prices(product, site))
+        if len(prices) < 3:
+            return self.default_interval
+        # Interpolate geometrically: each step in volatility scales the interval by the same factor
+        ratio = self.min_interval / self.max_interval
+        return self.max_interval * ratio ** volatility(prices)
+
+    def add(self, product: str, site: str, next_due: Optional[float] = None) -> None:
+        """Schedule a product on a site; new items are due immediately by default"""
+        with self._lock:
+            if (product, site) in self._items:
+                return
+            item = ScheduledItem(
+                next_due=time.time() if next_due is None else next_due,
+                product=product,
+                site=site,
+                interval=self.interval_for(product, site)
+            )
+            self._items[(product, site)] = item
+            heapq.heappush(self._queue, item)
+
+    def due(self, limit: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """Pop the checks that are due and allowed by their site's rate limit
+
+        Due checks held back by a rate limit are pushed back until the site
+        has a token again. Popped checks must be handed to complete().
+        """
+        now = time.time() if now is None else now
+        ready, deferred = [], []
+        with self._lock:
+            while self._queue and self._queue[0].next_due <= now and (limit is None or len(ready) < limit):
+                item = heapq.heappop(self._queue)
+                bucket = self.bucket(item.site)
+                if bucket.try_acquire():
+                    ready.append(item)
+                else:
+                    item.next_due = now + bucket.wait_time()
+                    deferred.append(item)
+            for item in deferred:
+                heapq.heappush(self._queue, item)
+            self._running.update((item.product, item.site) for item in ready)
+        return [(item.product, item.site) for item in ready]
+
+    def complete(self, product: str, site: str, price: Optional[float] = None,
+                 now: Optional[float] = None) -> float:
+        """Record a finished check and schedule the next one
+
+        Args:
+            price: The price found, or None if the check failed
+
+        Returns:
+            float: Seconds until the product is checked again on that site
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            item = self._items.get((product, site))
+            if item is None or (product, site) not in self._running:
+                return 0.0
+            self._running.discard((product, site))
+            if price:
+                self._recent_prices(product, site).append(price)
+            item.interval = self.interval_for(product, site)
+            item.next_due = now + item.interval
+            heapq.heappush(self._queue, item)
+            return item.interval
+
+    def next_wakeup(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the earliest check is due, or None when nothing is scheduled"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._queue:
+                return None
+            return max(0.0, self._queue[0].next_due - now)
@@ -0,0 +1,123 @@
+import base64
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional, Tuple
+from PIL import Image
+
+def image_hash(image: Image.Image) -> int:
+    """64-bit difference hash; perceptually identical frames hash alike"""
+    small = image.convert('L').resize((9, 8), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two image hashes"""
+    return bin(a ^ b).count('1')
+
+class ScreenshotWriter:
+    """Encodes and writes screenshots on a background thread pool"""
+
+    def __init__(self, workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='screenshot')
+
+    def submit(self, image: Image.Image, path: str) -> Future:
+        """Queue an image to be encoded to path; the format follows the extension"""
+        return self._executor.submit(self._save, image, path)
+
+    @staticmethod
+    def _save(image: Image.Image, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.lower().endswith('.webp'):
+            image.save(path, format='WEBP', quality=80, method=4)
+        else:
+            image.save(path, format='PNG', optimize=False)
+        return path
+
+    def close(self) -> None:
+        """Wait for queued screenshots to be written"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ScreenshotPipeline:
+    """Captures screenshots at a bounded resolution and skips repeated frames"""
+
+    def __init__(self, driver, max_width: Optional[int] = 1280,
+                 clip: Optional[Tuple[float, float, float, float]] = None,
+                 dedup_threshold: int = 2):
+        self.driver = driver
+        self.max_width = max_width
+        self.clip = clip
+        self.dedup_threshold = dedup_threshold
+        self._last_hash: Optional[int] = None
+
+    def _region(self) -> Tuple[float, float, float, float]:
+        if self.clip:
+            return self.clip
+        # CDP clips are in page coordinates, so the visible viewport has to
+        # be offset by the current scroll position
+        x, y, width, height = self.driver.execute_script(
+            "return [window.scrollX, window.scrollY, window.innerWidth, window.innerHeight];"
+        )
+        return x, y, width, height
+
+    def _capture_cdp(self) -> Image.Image:
+        # Let Chrome do the clipping and scaling so less data is encoded and sent
+        x, y, width, height = self._region()
+        scale = min(1.0, self.max_width / width) if self.max_width else 1.0
+        response = self.driver.execute_cdp_cmd('Page.captureScreenshot', {
+            'format': 'png',
+            'clip': {'x': x, 'y': y, 'width': width, 'height': height, 'scale': scale}
+        })
+        return Image.open(BytesIO(base64.b64decode(response['data'])))
+
+    def _capture_webdriver(self) -> Image.Image:
+        image = Image.open(BytesIO(self.driver.get_screenshot_as_png()))
+        if self.clip:
+            x, y, width, height = self.clip
+            image = image.crop((x, y, x + width, y + height))
+        if self.max_width and image.width > self.max_width:
+            image = image.resize(
+                (self.max_width, round(image.height * self.max_width / image.width)),
+                Image.BILINEAR
+            )
+        return image
+
+    def reset(self) -> None:
+        """Forget the last frame, so the next capture is never a duplicate"""
+        self._last_hash = None
+
+    def capture(self, skip_duplicates: bool = False) -> Optional[Image.Image]:
+        """Capture the current page.
+
+        Returns None when skip_duplicates is set and the frame looks the same
+        as the previous capture.
+        """
+        if hasattr(self.driver, 'execute_cdp_cmd'):
+            try:
+                image = self._capture_cdp()
+            except Exception:
+                image = self._capture_webdriver()
+        else:
+            image = self._capture_webdriver()
+
+        frame_hash = image_hash(image)
+        duplicate = (self._last_hash is not None
+                     and hash_distance(frame_hash, self._last_hash) <= self.dedup_threshold)
+        self._last_hash = frame_hash
+        if skip_duplicates and duplicate:
+            return None
+        return image
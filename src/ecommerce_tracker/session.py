@@ -0,0 +1,52 @@
+import os
+import threading
+from typing import Optional, Tuple
+from .browser_pool import BrowserPool
+
+class SessionManager:
+    """Keeps browsers warm across PriceTrackerAgent instances and runs.
+
+    Agents created with the same session share one browser pool, so Chrome
+    is started at most once per pooled browser. With a profile_dir, every
+    browser keeps a persistent user-data-dir, so cookies and dismissed
+    consent popups survive between runs.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None, headless: bool = True,
+                 block_resources: bool = True, screenshot_width: Optional[int] = 1280,
+                 screenshot_clip: Optional[Tuple[float, float, float, float]] = None):
+        self.profile_dir = os.path.abspath(profile_dir) if profile_dir else None
+        self.headless = headless
+        self.block_resources = block_resources
+        self.screenshot_width = screenshot_width
+        self.screenshot_clip = screenshot_clip
+        self._pool: Optional[BrowserPool] = None
+        self._lock = threading.Lock()
+
+    def pool(self, size: int = 1) -> BrowserPool:
+        """Get the warm browser pool, adding browsers if it holds fewer than size"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = BrowserPool(
+                    size=size,
+                    headless=self.headless,
+                    profile_dir=self.profile_dir,
+                    block_resources=self.block_resources,
+                    screenshot_width=self.screenshot_width,
+                    screenshot_clip=self.screenshot_clip
+                )
+            self._pool.grow(size)
+            return self._pool
+
+    def close(self) -> None:
+        """Shut down the warm browsers"""
+        with self._lock:
+            if self._pool:
+                self._pool.cleanup()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
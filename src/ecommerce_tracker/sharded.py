@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from .price_tracker_agent import PriceTrackerAgent
+from .results import is_failed, result_row
+from .session import SessionManager
+from .work_queue import QueueStats, WorkQueue
+
+def worker_id(shard: int, pid: Optional[int] = None) -> str:
+    """Name a worker process uniquely across hosts"""
+    return f"{socket.gethostname()}:{shard}:{pid or os.getpid()}"
+
+def run_worker(queue_path: str, shard: int, model_factory: Callable, agent_options: Dict,
+               session_options: Dict, concurrency: int = 8, lease_seconds: float = 900,
+               max_attempts: int = 3) -> None:
+    """Entry point of one worker process: track queued jobs until none are left
+
+    Each process has its own browsers and model client. Jobs of its own
+    shard are taken first; once that shard is drained it helps with the
+    others, so a fast host never sits idle while work remains.
+    """
+    me = worker_id(shard)
+    queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    profile_dir = session_options.get('profile_dir')
+    # Chrome locks its profile directory, so every process gets its own
+    session = SessionManager(
+        profile_dir=os.path.join(profile_dir, f"shard-{shard}") if profile_dir else None,
+        block_resources=session_options.get('block_resources', True),
+        screenshot_width=session_options.get('screenshot_width', 1280),
+        screenshot_clip=session_options.get('screenshot_clip')
+    )
+    model = model_factory()
+    agent = PriceTrackerAgent(model=model, session=session, **agent_options)
+
+    # Leases are renewed while the process lives; a dead process's leases run out
+    stop = threading.Event()
+    def heartbeat() -> None:
+        while not stop.wait(lease_seconds / 3):
+            queue.renew(me, lease_seconds)
+    threading.Thread(target=heartbeat, name='lease-heartbeat', daemon=True).start()
+
+    try:
+        while True:
+            jobs = (queue.lease(me, concurrency, shard=shard, lease_seconds=lease_seconds)
+                    or queue.lease(me, concurrency, lease_seconds=lease_seconds))
+            if not jobs:
+                if queue.stats().remaining == 0:
+                    break
+                # Other workers still hold jobs; pick them up if their leases run out
+                time.sleep(min(30.0, lease_seconds / 10))
+                continue
+
+            window: Dict[str, List[str]] = {}
+            for product, site in jobs:
+                window.setdefault(product, []).append(site)
+            print(f"[{me}] Tracking {len(jobs)} jobs...")
+            results = asyncio.run(agent.track_many(list(window.items())))
+            for product, product_results in zip(window, results):
+                for result in product_results:
+                    row = result_row(product, result)._asdict()
+                    if is_failed(result):
+                        # Counts as an attempt; the job is retried or, after max_attempts, failed
+                        queue.fail(me, product, result.site, row)
+                    else:
+                        queue.complete(me, product, result.site, row)
+    finally:
+        stop.set()
+        # Whatever is still leased was not finished; let another worker have it
+        queue.release(me)
+        agent.cleanup()
+        session.close()
+        if hasattr(model, 'close'):
+            model.close()
+        queue.close()
+
+def run_sharded(queue_path: str, processes: int, model_factory: Callable, agent_options: Dict,
+                session_options: Optional[Dict] = None, concurrency: int = 8, lease_seconds: float = 900,
+                max_attempts: int = 3, max_restarts: int = 3, progress_interval: float = 30) -> QueueStats:
+    """Run worker processes over a queue until it is drained
+
+    A worker that dies has its jobs re-queued at once and is restarted, up
+    to max_restarts times per shard. model_factory must be picklable, as it
+    is called inside each worker process.
+    """
+    # Chrome, threads and SQLite connections do not survive fork()
+    context = multiprocessing.get_context('spawn')
+    queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    restarts = {shard: 0 for shard in range(processes)}
+
+    def start(shard: int):
+        process = context.Process(
+            target=run_worker,
+            args=(queue_path, shard, model_factory, agent_options, session_options or {},
+                  concurrency, lease_seconds, max_attempts),
+            name=f"shard-{shard}"
+        )
+        process.start()
+        return process
+
+    workers = {shard: start(shard) for shard in range(processes)}
+    last_progress = time.time()
+    try:
+        while workers:
+            for shard, process in list(workers.items()):
+                process.join(timeout=1)
+                if process.is_alive():
+                    continue
+                requeued = queue.release(worker_id(shard, process.pid))
+                del workers[shard]
+                if process.exitcode != 0:
+                    print(f"Worker for shard {shard} exited with code {process.exitcode}; "
+                          f"re-queued {requeued} jobs")
+                    if restarts[shard] < max_restarts and queue.stats().remaining:
+                        restarts[shard] += 1
+                        workers[shard] = start(shard)
+            if time.time() - last_progress >= progress_interval:
+                stats = queue.stats()
+                print(f"Queue: {stats.done} done, {stats.leased} in progress, "
+                      f"{stats.pending} pending, {stats.failed} failed")
+                last_progress = time.time()
+    except KeyboardInterrupt:
+        for shard, process in workers.items():
+            process.terminate()
+            process.join()
+            queue.release(worker_id(shard, process.pid))
+        raise
+    finally:
+        stats = queue.stats()
+        queue.close()
+    return stats
@@ -0,0 +1,202 @@
+import csv
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Type
+from .results import ResultRow
+
+FIELDS = ['product', 'site', 'price', 'availability', 'seller_rating', 'screenshot_path', 'tracked_at']
+
+class ResultSink(ABC):
+    """Writes results as they are produced.
+
+    Buffered rows are flushed every flush_every results. If fsync_interval is
+    set, flushed data is also fsynced at most once per that many seconds, so
+    a crash loses at most that window of results.
+    """
+
+    extension = ''
+
+    def __init__(self, path: str, flush_every: int = 1, fsync_interval: Optional[float] = None):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.fsync_interval = fsync_interval
+        self._pending = 0
+        self._last_fsync = time.time()
+        self._lock = threading.Lock()
+        self.file = None
+
+    def write(self, row: ResultRow) -> None:
+        """Write one result"""
+        record = row._asdict()
+        record['tracked_at'] = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._write_record(record)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> None:
+        """Flush buffered results to disk"""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Flush, sync and close the sink"""
+        with self._lock:
+            self._flush()
+            if self.file:
+                os.fsync(self.file.fileno())
+            self._close()
+
+    @abstractmethod
+    def _write_record(self, record: Dict) -> None:
+        """Buffer one record in the sink's format"""
+
+    def _flush(self) -> None:
+        self._pending = 0
+        if not self.file:
+            return
+        self.file.flush()
+        if self.fsync_interval is not None and time.time() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self.file.fileno())
+            self._last_fsync = time.time()
+
+    def _close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class TextSink(ResultSink):
+    """Human-readable price report"""
+
+    extension = 'txt'
+
+    def __init__(self, path: str, title: Optional[str] = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.file = open(path, 'w', encoding='utf-8')
+        if title:
+            self.file.write(f"Price Report for: {title}\n")
+        self.file.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+    def _write_record(self, record: Dict) -> None:
+        self.file.write(f"\nProduct: {record['product']}\n")
+        self.file.write(f"Site: {record['site']}\n")
+        self.file.write(f"Price: ${record['price']:.2f}\n")
+        self.file.write(f"Availability: {record['availability']}\n")
+        if record['seller_rating']:
+            self.file.write(f"Seller Rating: {record['seller_rating']}/5.0\n")
+        if record['screenshot_path']:
+            self.file.write(f"Screenshot saved: {record['screenshot_path']}\n")
+
+class CsvSink(ResultSink):
+    extension = 'csv'
+
+    def __init__(self, path: str, append: bool = False, **kwargs):
+        super().__init__(path, **kwargs)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+        if write_header:
+            self._writer.writeheader()
+
+    def _write_record(self, record: Dict) -> None:
+        self._writer.writerow(record)
+
+class JsonlSink(ResultSink):
+    extension = 'jsonl'
+
+    def __init__(self, path: str, append: bool = False, **kwargs):
+        super().__init__(path, **kwargs)
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        if append and self.file.tell() > 0:
+            # Terminate a line left truncated by a crash before appending
+            with open(path, 'rb') as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b'\n':
+                    self.file.write('\n')
+
+    def _write_record(self, record: Dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+class ParquetSink(ResultSink):
+    """Parquet file written one row group per flush (requires pyarrow)"""
+
+    extension = 'parquet'
+
+    def __init__(self, path: str, flush_every: int = 500, **kwargs):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+        super().__init__(path, flush_every=flush_every, **kwargs)
+        self._pa = pa
+        self._schema = pa.schema([
+            ('product', pa.string()),
+            ('site', pa.string()),
+            ('price', pa.float64()),
+            ('availability', pa.string()),
+            ('seller_rating', pa.float64()),
+            ('screenshot_path', pa.string()),
+            ('tracked_at', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows: List[Dict] = []
+
+    def _write_record(self, record: Dict) -> None:
+        self._rows.append(record)
+
+    def _flush(self) -> None:
+        self._pending = 0
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def _close(self) -> None:
+        self._writer.close()
+
+class XlsxSink(ResultSink):
+    """Excel workbook built with openpyxl's write-only mode.
+
+    Rows are streamed into the workbook without keeping cell objects in
+    memory, but the xlsx format can only be saved once, on close. columns,
+    a list of (header, field) pairs, picks and names the columns; by default
+    every field is written under its own name.
+    """
+
+    extension = 'xlsx'
+
+    def __init__(self, path: str, columns: Optional[List[Tuple[str, str]]] = None, **kwargs):
+        from openpyxl import Workbook
+        super().__init__(path, **kwargs)
+        self.columns = columns or [(name, name) for name in FIELDS]
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('Results')
+        self._sheet.append([header for header, _ in self.columns])
+
+    def _write_record(self, record: Dict) -> None:
+        self._sheet.append([record[field] for _, field in self.columns])
+
+    def _close(self) -> None:
+        self._workbook.save(self.path)
+
+SINKS: Dict[str, Type[ResultSink]] = {
+    sink.extension: sink for sink in (TextSink, CsvSink, JsonlSink, ParquetSink, XlsxSink)
+}
+
+def open_sink(path: str, format: Optional[str] = None, **kwargs) -> ResultSink:
+    """Open a sink for path, picking the format from its extension by default"""
+    format = format or os.path.splitext(path)[1].lstrip('.').lower()
+    if format not in SINKS:
+        raise ValueError(f"Unsupported output format '{format}', choose one of: {', '.join(SINKS)}")
+    return SINKS[format](path, **kwargs)
@@ -0,0 +1,130 @@
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+from .prices import parse_price
+
+_JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+_NEXT_DATA_RE = re.compile(
+    r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Keys that hold the selling price in server-rendered app state, best first
+PRICE_KEYS = ['sale_price', 'salePrice', 'offer_price', 'offerPrice', 'price_now', 'priceNow',
+              'current_price', 'currentPrice', 'price']
+NAME_KEYS = ['name', 'title', 'product_name', 'productName']
+AVAILABILITY_KEYS = ['availability', 'stock_status', 'stockStatus', 'is_buyable', 'isBuyable', 'in_stock', 'inStock']
+RATING_KEYS = ['rating', 'ratingValue', 'product_rating', 'average_rating', 'averageRating']
+
+def _to_float(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # Embedded data is machine-formatted: '.' is always the decimal separator
+        return parse_price(value, locale='en')
+    if isinstance(value, dict):
+        return _to_float(value.get('value', value.get('amount')))
+    return None
+
+def _availability_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "In Stock" if value else "Out of Stock"
+    text = str(value)
+    # schema.org availability is a URL such as https://schema.org/InStock
+    text = text.rsplit('/', 1)[-1]
+    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)
+
+def _types(node: Dict) -> List[str]:
+    value = node.get('@type', [])
+    return value if isinstance(value, list) else [value]
+
+def _walk(node: Any, depth: int = 0, max_depth: int = 12) -> Iterator[Dict]:
+    if depth > max_depth:
+        return
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value, depth + 1, max_depth)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value, depth + 1, max_depth)
+
+def _from_json_ld(document: Any) -> Optional[Dict]:
+    for node in _walk(document):
+        if 'Product' not in _types(node):
+            continue
+        offers = node.get('offers') or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        # Offers may also be given as a bare URL to a separate Offer resource
+        if not isinstance(offers, dict):
+            continue
+        price = _to_float(offers.get('price', offers.get('lowPrice')))
+        # A zero or unreadable price is missing data; let the browser have a look
+        if not price or price <= 0:
+            continue
+        rating = node.get('aggregateRating') or {}
+        return {
+            'name': node.get('name'),
+            'price': price,
+            'currency': offers.get('priceCurrency'),
+            'availability': _availability_text(offers.get('availability')),
+            'rating': _to_float(rating.get('ratingValue')) if isinstance(rating, dict) else None,
+            'url': node.get('url') or offers.get('url'),
+            'source': 'json-ld'
+        }
+    return None
+
+def _first(node: Dict, keys: List[str]):
+    for key in keys:
+        if key in node and node[key] not in (None, ''):
+            return node[key]
+    return None
+
+def _from_next_data(document: Any) -> Optional[Dict]:
+    # App state has no fixed schema, so take the first object that looks like
+    # a product: a name next to a usable price
+    for node in _walk(document, max_depth=20):
+        name = _first(node, NAME_KEYS)
+        price = _to_float(_first(node, PRICE_KEYS))
+        if not isinstance(name, str) or not price or price <= 0:
+            continue
+        return {
+            'name': name,
+            'price': price,
+            'currency': node.get('currency') or node.get('currency_code'),
+            'availability': _availability_text(_first(node, AVAILABILITY_KEYS)),
+            'rating': _to_float(_first(node, RATING_KEYS)),
+            'url': node.get('url'),
+            'source': '__NEXT_DATA__'
+        }
+    return None
+
+def parse_product_data(html: str) -> Optional[Dict]:
+    """Read product price data embedded in a page.
+
+    Looks at JSON-LD Product/Offer blocks first and the Next.js
+    __NEXT_DATA__ payload second. Returns None when neither has a price.
+    """
+    for match in _JSON_LD_RE.finditer(html):
+        try:
+            product = _from_json_ld(json.loads(match.group(1).strip()))
+        except ValueError:
+            continue
+        if product:
+            return product
+
+    match = _NEXT_DATA_RE.search(html)
+    if match:
+        try:
+            return _from_next_data(json.loads(match.group(1)))
+        except ValueError:
+            return None
+    return None
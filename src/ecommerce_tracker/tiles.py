@@ -0,0 +1,98 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import prices
+from .recipes import NOON_TILE_CONTAINER, NOON_TILE_FIELDS
+from .tracing import span
+
+# Reads every tile under a container selector, from index start on, in one
+# round-trip and returns the fields column by column. Within a tile the
+# selectors of a field are tried in order; fields listed in attrs prefer that
+# attribute over the text. count is the number of tiles on the whole page.
+_EXTRACT_TILES_SCRIPT = """
+var containers = document.querySelectorAll(arguments[0]);
+var fields = arguments[1];
+var attrs = arguments[2] || {};
+var start = arguments[3] || 0;
+var columns = {};
+for (var field in fields) { columns[field] = []; }
+for (var c = start; c < containers.length; c++) {
+    var container = containers[c];
+    for (var field in fields) {
+        var value = '';
+        var selectors = fields[field];
+        for (var i = 0; i < selectors.length && !value; i++) {
+            var el;
+            try { el = container.querySelector(selectors[i]); } catch (e) { continue; }
+            if (!el) { continue; }
+            if (attrs[field]) { value = (el.getAttribute(attrs[field]) || '').trim(); }
+            if (!value) { value = (el.innerText || el.textContent || '').trim(); }
+        }
+        columns[field].push(value);
+    }
+}
+return {count: containers.length, columns: columns};
+"""
+
+def parse_prices(texts: List[str], default: float = 0.0) -> array:
+    """Parse a column of price texts such as 'EGP 1,299.00' or '١٬٢٩٩ ج.م'"""
+    return prices.parse_prices(texts, default=default)
+
+def parse_ratings(texts: List[str], default: float = float('nan')) -> array:
+    """Parse a column of rating texts such as '4.5/5'; missing ratings become NaN"""
+    return array('d', (prices.parse_number(text, default) for text in texts))
+
+@dataclass
+class TileColumns:
+    """Product tiles of a results page, one column per field"""
+    names: List[str] = field(default_factory=list)
+    prices: array = field(default_factory=lambda: array('d'))
+    ratings: array = field(default_factory=lambda: array('d'))
+    availability: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extend(self, other: 'TileColumns') -> None:
+        self.names.extend(other.names)
+        self.prices.extend(other.prices)
+        self.ratings.extend(other.ratings)
+        self.availability.extend(other.availability)
+
+    def slice(self, stop: int) -> 'TileColumns':
+        """The first stop tiles"""
+        return TileColumns(self.names[:stop], self.prices[:stop], self.ratings[:stop], self.availability[:stop])
+
+    def rows(self) -> Iterator[Tuple[str, float, Optional[float], str]]:
+        """(name, price, rating, availability) per tile, with None for a missing rating"""
+        for name, price, rating, availability in zip(self.names, self.prices, self.ratings, self.availability):
+            yield name, price, None if rating != rating else rating, availability
+
+def extract_tiles(driver, container_selector: str = NOON_TILE_CONTAINER,
+                  fields: Dict[str, List[str]] = NOON_TILE_FIELDS,
+                  attrs: Optional[Dict[str, str]] = None, start: int = 0) -> TileColumns:
+    """Read name, price, rating and availability of every tile in a single script call
+
+    With start, only tiles from that index on are read, for pages that load
+    more tiles as they are scrolled.
+    """
+    attrs = {'name': 'title'} if attrs is None else attrs
+    try:
+        with span('extract_tiles') as span_attrs:
+            raw = driver.execute_script(_EXTRACT_TILES_SCRIPT, container_selector, fields, attrs, start) or {}
+            span_attrs['tiles'] = raw.get('count', 0) - start
+    except Exception as e:
+        print(f"Failed to extract product tiles: {str(e)}")
+        return TileColumns()
+
+    columns = raw.get('columns') or {}
+    count = max(raw.get('count', 0) - start, 0)
+    def column(name: str) -> List[str]:
+        return columns.get(name) or [''] * count
+
+    return TileColumns(
+        names=column('name'),
+        prices=parse_prices(column('price')),
+        ratings=parse_ratings(column('rating')),
+        availability=column('availability')
+    )
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float
+    thread: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class StageSummary:
+    name: str
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p95: float
+    max: float
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values, with q between 0 and 1"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class Tracer:
+    """Collects timed spans from every thread of a run.
+
+    Spans are kept only while the tracer is enabled, and handed to any
+    listeners (such as live metrics) as they finish. With neither, the
+    instrumented code costs next to nothing.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[Span] = []
+        self.listeners: List[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+        # Span starts are wall-clock seconds, measured with perf_counter
+        self._origin = time.time() - time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block as a span called name"""
+        if not self.enabled and not self.listeners:
+            yield attrs
+            return
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, start, time.perf_counter() - start, **attrs)
+
+    def record(self, name: str, start: float, duration: float, thread: Optional[str] = None, **attrs) -> None:
+        """Add a span measured elsewhere; start is a time.perf_counter() value
+
+        thread names the timeline the span is drawn on, for spans that do
+        not belong to the thread recording them.
+        """
+        if not self.enabled and not self.listeners:
+            return
+        span = Span(name, self._origin + start, duration, thread or threading.current_thread().name, attrs)
+        if self.enabled:
+            with self._lock:
+                self.spans.append(span)
+        for listener in self.listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                print(f"Span listener failed: {str(e)}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = []
+
+    def summary(self) -> List[StageSummary]:
+        """Per-stage totals, slowest stage first"""
+        with self._lock:
+            spans = list(self.spans)
+        by_name: Dict[str, List[float]] = {}
+        for span in spans:
+            by_name.setdefault(span.name, []).append(span.duration)
+
+        stages = []
+        for name, durations in by_name.items():
+            durations.sort()
+            total = sum(durations)
+            stages.append(StageSummary(
+                name=name,
+                count=len(durations),
+                total=total,
+                mean=total / len(durations),
+                p50=percentile(durations, 0.5),
+                p95=percentile(durations, 0.95),
+                max=durations[-1]
+            ))
+        return sorted(stages, key=lambda stage: stage.total, reverse=True)
+
+    def format_summary(self) -> str:
+        """The summary as a plain-text table"""
+        lines = [f"{'stage':<28} {'count':>6} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for stage in self.summary():
+            lines.append(
+                f"{stage.name:<28} {stage.count:>6} {stage.total:>9.2f} {stage.mean * 1000:>9.1f} "
+                f"{stage.p50 * 1000:>9.1f} {stage.p95 * 1000:>9.1f} {stage.max * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def export(self, path: str) -> None:
+        """Write the spans to path: Chrome trace format for .json, JSONL otherwise"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            spans = list(self.spans)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                # Load in chrome://tracing or Perfetto
+                threads: Dict[str, int] = {}
+                events = []
+                for span in spans:
+                    tid = threads.setdefault(span.thread, len(threads) + 1)
+                    events.append({
+                        'name': span.name,
+                        'ph': 'X',
+                        'ts': span.start * 1e6,
+                        'dur': span.duration * 1e6,
+                        'pid': os.getpid(),
+                        'tid': tid,
+                        'args': span.attrs
+                    })
+                events += [
+                    {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for name, tid in threads.items()
+                ]
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+            else:
+                for span in spans:
+                    f.write(json.dumps(asdict(span), default=str) + '\n')
+
+def _token_counts(model, response) -> Dict[str, Optional[int]]:
+    usage = getattr(response, 'token_usage', None)
+    if usage is not None:
+        return {'input_tokens': getattr(usage, 'input_tokens', None),
+                'output_tokens': getattr(usage, 'output_tokens', None)}
+    # Older smolagents keep the counts of the last call on the model
+    return {'input_tokens': getattr(model, 'last_input_token_count', None),
+            'output_tokens': getattr(model, 'last_output_token_count', None)}
+
+class TracedModel:
+    """Wraps a smolagents model so every call is recorded as an 'llm' span with its token counts"""
+
+    def __init__(self, model, tracer: Optional[Tracer] = None):
+        self.model = model
+        self.tracer = tracer or TRACER
+
+    def __getattr__(self, name):
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _traced(self, call, messages, stop_sequences=None, **kwargs):
+        with self.tracer.span('llm', model=getattr(self.model, 'model_id', None)) as attrs:
+            response = call(messages, stop_sequences=stop_sequences, **kwargs)
+            attrs.update(_token_counts(self.model, response))
+            return response
+
+    def __call__(self, messages, stop_sequences=None, **kwargs):
+        return self._traced(self.model, messages, stop_sequences=stop_sequences, **kwargs)
+
+    def generate(self, messages, stop_sequences=None, **kwargs):
+        return self._traced(self.model.generate, messages, stop_sequences=stop_sequences, **kwargs)
+
+# Process-wide tracer used by the instrumented modules
+TRACER = Tracer()
+
+def span(name: str, **attrs):
+    """Time a block on the process-wide tracer"""
+    return TRACER.span(name, **attrs)
@@ -0,0 +1,108 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+from .browser_manager import CACHE_DIR
+from .prices import ascii_digits
+
+PRODUCT_URL_PATH = os.path.join(CACHE_DIR, 'product_urls.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_urls (
+    site TEXT NOT NULL,
+    query TEXT NOT NULL,
+    url TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (site, query)
+);
+"""
+
+# Words in any script, so Arabic queries are not reduced to nothing
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+def _words(text: str):
+    return _TOKEN_RE.findall(ascii_digits(text).lower())
+
+def _tokens(text: str):
+    return [token for token in _words(text) if len(token) > 1]
+
+def normalize_query(query: str) -> str:
+    """Lower-cased query with punctuation and repeated spaces removed"""
+    return ' '.join(_words(query))
+
+def relevance(query: str, name: Optional[str]) -> float:
+    """Share of the query's words that appear in a product name, from 0 to 1"""
+    words = _tokens(query)
+    if not words:
+        return 1.0
+    found = set(_tokens(name or ''))
+    return sum(word in found for word in words) / len(words)
+
+def matches_query(query: str, name: Optional[str]) -> bool:
+    """Whether a product name plausibly belongs to a search query
+
+    An unknown name counts as a match; a known one must contain at least
+    half of the query's words.
+    """
+    if not name:
+        return True
+    return relevance(query, name) >= 0.5
+
+class ProductUrlCache:
+    """Remembers which product page a search for a query led to on each site.
+
+    Entries live in SQLite, so several processes can share the cache and a
+    new entry costs one row rather than a rewrite of the whole cache. With
+    no path the cache only lasts as long as the process.
+    """
+
+    def __init__(self, path: Optional[str] = PRODUCT_URL_PATH):
+        self.path = path
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path or ':memory:', check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, query: str, site: str) -> Optional[str]:
+        """Get the product page found for a query on a site, if any"""
+        key = normalize_query(query)
+        if not key:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url FROM product_urls WHERE site = ? AND query = ?", (site, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, query: str, site: str, url: str) -> None:
+        """Remember the product page a search led to"""
+        key = normalize_query(query)
+        # A query without words would share its entry with every other such query
+        if not key:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO product_urls (site, query, url, updated_at) VALUES (?, ?, ?, ?)",
+                (site, key, url, time.time())
+            )
+
+    def invalidate(self, query: str, site: str) -> None:
+        """Forget a product page that has gone away or no longer matches the query"""
+        key = normalize_query(query)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM product_urls WHERE site = ? AND query = ?", (site, key)
+            )
+        if cursor.rowcount:
+            print(f"Forgetting product page for {query} on {site}")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
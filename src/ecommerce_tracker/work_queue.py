@@ -0,0 +1,188 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (product, site)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_shard ON jobs (status, shard);
+CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs (worker);
+"""
+
+def shard_of(product: str, site: str, shards: int) -> int:
+    """Stable shard of a (product, site) pair; the same on every host and run"""
+    digest = hashlib.sha1(f"{product}|{site}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+@dataclass
+class QueueStats:
+    pending: int = 0
+    leased: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.pending + self.leased
+
+class WorkQueue:
+    """SQLite queue of (product, site) jobs that processes on several hosts can share.
+
+    Workers lease jobs for a while; leases that run out, or that belong to a
+    worker known to have crashed, go back to pending, so no job is lost.
+    Jobs that keep failing are marked failed after max_attempts leases.
+    """
+
+    def __init__(self, path: str = 'jobs.db', max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        # Other processes hold the write lock briefly; wait for it rather than fail
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _transaction(self, statements) -> List:
+        """Run statements in one write transaction, taking the database lock up front"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, jobs: Iterable[Tuple[str, str]], shards: int) -> int:
+        """Add (product, site) jobs; jobs already queued by anyone are left alone
+
+        Returns:
+            int: Number of jobs added
+        """
+        now = time.time()
+        records = [(product, site, shard_of(product, site, shards), now) for product, site in jobs]
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (product, site, shard, updated_at) VALUES (?, ?, ?, ?)", records
+            )
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def _expire(self, conn, now: float) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_until < ?",
+            (self.max_attempts, now, now)
+        )
+
+    def lease(self, worker: str, limit: int = 8, shard: Optional[int] = None,
+              lease_seconds: float = 900) -> List[Tuple[str, str]]:
+        """Lease up to limit pending jobs, from one shard if given
+
+        Expired leases are returned to the queue first.
+        """
+        def take(conn):
+            now = time.time()
+            self._expire(conn, now)
+            query = "SELECT product, site FROM jobs WHERE status = 'pending'"
+            params: list = []
+            if shard is not None:
+                query += " AND shard = ?"
+                params.append(shard)
+            rows = conn.execute(query + " ORDER BY attempts, rowid LIMIT ?", params + [limit]).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE product = ? AND site = ?",
+                [(worker, now + lease_seconds, now, product, site) for product, site in rows]
+            )
+            return rows
+        return [tuple(row) for row in self._transaction(take)]
+
+    def renew(self, worker: str, lease_seconds: float = 900) -> None:
+        """Extend every lease a worker holds"""
+        now = time.time()
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE status = 'leased' AND worker = ?",
+            (now + lease_seconds, now, worker)
+        ))
+
+    def complete(self, worker: str, product: str, site: str, result: Dict) -> bool:
+        """Store a job's result; False if the lease was lost to another worker"""
+        def finish(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE product = ? AND site = ? AND status = 'leased' AND worker = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), product, site, worker)
+            )
+            return cursor.rowcount > 0
+        return self._transaction(finish)
+
+    def fail(self, worker: str, product: str, site: str, result: Dict) -> bool:
+        """Give back a job whose check failed, so it is retried until max_attempts
+
+        The failed result is kept, so a job given up on shows why.
+        Returns False if the lease was lost to another worker.
+        """
+        def give_back(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "result = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE product = ? AND site = ? AND status = 'leased' AND worker = ?",
+                (self.max_attempts, json.dumps(result, ensure_ascii=False), time.time(), product, site, worker)
+            )
+            return cursor.rowcount > 0
+        return self._transaction(give_back)
+
+    def release(self, worker: str) -> int:
+        """Put every job a worker holds back in the queue, e.g. after it crashed
+
+        Returns:
+            int: Number of jobs re-queued
+        """
+        def requeue(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_until = NULL, updated_at = ? WHERE status = 'leased' AND worker = ?",
+                (self.max_attempts, time.time(), worker)
+            )
+            return cursor.rowcount
+        return self._transaction(requeue)
+
+    def stats(self) -> QueueStats:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        stats = QueueStats()
+        for status, count in rows:
+            setattr(stats, status, count)
+        return stats
+
+    def results(self) -> Iterable[Tuple[str, Dict]]:
+        """(product, result) for every finished job, in the order they were queued"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT product, result FROM jobs WHERE status = 'done' ORDER BY rowid"
+            ).fetchall()
+        for product, result in rows:
+            yield product, json.loads(result)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
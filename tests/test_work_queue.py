@@ -0,0 +1,30 @@
+from ecommerce_tracker.results import ResultRow, is_failed
+from ecommerce_tracker.work_queue import WorkQueue
+
+ERROR_ROW = ResultRow('iphone 16 pro', 'noon.com', 0.0, 'Error: chrome not reachable', 0.0, None)._asdict()
+
+def test_failed_check_is_retried_then_marked_failed(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'jobs.db'), max_attempts=3)
+    queue.enqueue([('iphone 16 pro', 'noon.com')], shards=1)
+
+    for attempt in range(1, 4):
+        jobs = queue.lease('worker-1')
+        assert jobs == [('iphone 16 pro', 'noon.com')], f"attempt {attempt}"
+        assert is_failed(ERROR_ROW)
+        assert queue.fail('worker-1', 'iphone 16 pro', 'noon.com', ERROR_ROW)
+
+    stats = queue.stats()
+    assert (stats.pending, stats.done, stats.failed) == (0, 0, 1)
+    assert queue.lease('worker-1') == []
+    queue.close()
+
+def test_successful_check_is_done(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'jobs.db'))
+    queue.enqueue([('iphone 16 pro', 'noon.com')], shards=1)
+    queue.lease('worker-1')
+    row = ResultRow('iphone 16 pro', 'noon.com', 58599.0, 'In stock', 4.6, None)._asdict()
+    assert not is_failed(row)
+    assert queue.complete('worker-1', 'iphone 16 pro', 'noon.com', row)
+    assert queue.stats().done == 1
+    assert list(queue.results()) == [('iphone 16 pro', row)]
+    queue.close()